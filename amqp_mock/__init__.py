@@ -4,13 +4,14 @@ from ._message import Message, MessageStatus, QueuedMessage
 from ._mock_client import AmqpMockClient
 from ._mock_server import AmqpMockServer
 from ._storage import Storage
+from ._supervisor import AmqpMockSupervisor
 from ._version import version
 from .amqp_server import AmqpServer
 from .http_server import HttpServer
 
 __version__ = version
 __all__ = ("AmqpServer", "HttpServer", "Storage",
-           "AmqpMockClient", "AmqpMockServer", "create_amqp_mock",
+           "AmqpMockClient", "AmqpMockServer", "AmqpMockSupervisor", "create_amqp_mock",
            "Message", "MessageStatus", "QueuedMessage",)
 
 
@@ -1,3 +1,4 @@
+import json
 from enum import Enum
 from typing import Any, Dict, Optional
 from uuid import uuid4
@@ -12,20 +13,63 @@ class MessageStatus(str, Enum):
     NACKED = "NACKED"
 
 
+_NOT_DECODED = object()
+
+
 class Message:
-    __slots__ = ("value", "id", "exchange", "routing_key", "properties",)
+    __slots__ = ("_value", "_body", "id", "exchange", "routing_key", "properties",)
 
-    def __init__(self, value: Any, *,
+    def __init__(self, value: Any = None, *,
                  id: Optional[str] = None,
                  exchange: Optional[str] = None,
                  routing_key: Optional[str] = None,
-                 properties: Optional[Dict[str, Any]] = None) -> None:
-        self.value = value
+                 properties: Optional[Dict[str, Any]] = None,
+                 body: Optional[bytes] = None) -> None:
+        self._value = value if body is None else _NOT_DECODED
+        self._body = body
         self.id = id or str(uuid4())
         self.exchange = exchange or ""
         self.routing_key = routing_key or ""
         self.properties = properties
 
+    @property
+    def value(self) -> Any:
+        # Published bodies are decoded only when someone looks at them
+        if self._value is _NOT_DECODED:
+            self._value = self._decode(self._body or b"")
+        return self._value
+
+    @value.setter
+    def value(self, value: Any) -> None:
+        self._value = value
+        self._body = None
+
+    @property
+    def body(self) -> bytes:
+        if self._body is None:
+            self._body = json.dumps(self._value).encode()
+        return self._body
+
+    @body.setter
+    def body(self, body: bytes) -> None:
+        self._body = body
+        self._value = _NOT_DECODED
+
+    @property
+    def size(self) -> int:
+        return len(self.body)
+
+    @staticmethod
+    def _decode(body: bytes) -> Any:
+        try:
+            return json.loads(body)
+        except ValueError:
+            pass
+        try:
+            return body.decode()
+        except UnicodeDecodeError:
+            return str(bytes(body))
+
     def to_dict(self) -> Dict[str, Any]:
         return {
             "id": self.id,
@@ -1,4 +1,4 @@
-from typing import Callable, List
+from typing import Any, Callable, Dict, List
 
 from aiohttp import ClientSession
 
@@ -54,6 +54,36 @@ class AmqpMockClient:
                 body = await resp.json()
                 return [QueuedMessage.from_dict(x) for x in body]
 
+    async def get_metrics(self) -> Dict[str, Any]:
+        url = f"{self._api_url}/metrics"
+        async with self._session_factory() as session:
+            async with session.get(url) as resp:
+                assert resp.status == 200, resp
+                metrics: Dict[str, Any] = await resp.json()
+                return metrics
+
+    async def get_wire_tap(self) -> Dict[str, Any]:
+        url = f"{self._api_url}/wiretap"
+        async with self._session_factory() as session:
+            async with session.get(url) as resp:
+                assert resp.status == 200, resp
+                wire_tap: Dict[str, Any] = await resp.json()
+                return wire_tap
+
+    async def set_wire_tap(self, size: int) -> None:
+        url = f"{self._api_url}/wiretap"
+        async with self._session_factory() as session:
+            async with session.put(url, json={"size": size}) as resp:
+                assert resp.status == 200, resp
+
+    async def get_workers(self) -> Dict[str, Dict[str, int]]:
+        url = f"{self._api_url}/workers"
+        async with self._session_factory() as session:
+            async with session.get(url) as resp:
+                assert resp.status == 200, resp
+                workers: Dict[str, Dict[str, int]] = await resp.json()
+                return workers
+
     def __repr__(self) -> str:
         cls_name = self.__class__.__name__
         return f"<{cls_name} host={self._host!r} port={self._port!r}>"
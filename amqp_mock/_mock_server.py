@@ -13,6 +13,7 @@ class AmqpMockServer:
                  client_factory: Callable[[str, int], AmqpMockClient] = AmqpMockClient) -> None:
         self._http_server = http_server
         self._amqp_server = amqp_server
+        self._http_server.amqp_server = amqp_server
         self._client_factory = client_factory
         self._http_runner: Optional[web.AppRunner] = None
         self._amqp_runner: Optional[AmqpRunner] = None
@@ -0,0 +1,183 @@
+from collections import defaultdict
+from typing import (
+    Any,
+    DefaultDict,
+    Dict,
+    Generic,
+    Hashable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    TypeVar,
+    cast,
+)
+
+__all__ = ("HeadersIndex", "RoutingTable", "TopicTrie",)
+
+T = TypeVar("T", bound=Hashable)
+
+# Binding header without a value (void) matches any value of the header
+_ANY_VALUE = object()
+
+
+def _get_key(value: Any) -> Hashable:
+    # Tables and arrays are compared by their representation
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return cast(Hashable, value)
+
+
+class RoutingTable(Generic[T]):
+    def __init__(self) -> None:
+        # routing key -> destinations in binding order (a dict as an ordered set)
+        self._binds: Dict[str, Dict[T, None]] = {}
+        # Rebuilt on every change, so that routing is a lookup of a ready tuple
+        self._routes: Dict[str, Tuple[T, ...]] = {}
+        self._destinations: Optional[Tuple[T, ...]] = ()
+
+    @property
+    def destinations(self) -> Tuple[T, ...]:
+        # Every destination once, whatever the routing key (fanout)
+        if self._destinations is None:
+            self._destinations = tuple(
+                dict.fromkeys(x for destinations in self._routes.values() for x in destinations)
+            )
+        return self._destinations
+
+    def bind(self, routing_key: str, destination: T) -> bool:
+        destinations = self._binds.setdefault(routing_key, {})
+        if destination in destinations:
+            return False
+        destinations[destination] = None
+        self._routes[routing_key] = tuple(destinations)
+        self._destinations = None
+        return True
+
+    def get(self, routing_key: str) -> Tuple[T, ...]:
+        return self._routes.get(routing_key, ())
+
+    def __iter__(self) -> Iterator[Tuple[str, T]]:
+        for routing_key, destinations in self._routes.items():
+            for destination in destinations:
+                yield routing_key, destination
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+    def __repr__(self) -> str:
+        cls_name = self.__class__.__name__
+        return f"<{cls_name} routing_keys={len(self._routes)!r}>"
+
+
+class _TopicNode(Generic[T]):
+    __slots__ = ("children", "values",)
+
+    def __init__(self) -> None:
+        self.children: Dict[str, _TopicNode[T]] = {}
+        self.values: Dict[T, None] = {}
+
+
+class TopicTrie(Generic[T]):
+    def __init__(self) -> None:
+        self._root: _TopicNode[T] = _TopicNode()
+        self._patterns = 0
+
+    def add(self, pattern: str, value: T) -> None:
+        node = self._root
+        for word in pattern.split("."):
+            child = node.children.get(word)
+            if child is None:
+                child = node.children[word] = _TopicNode()
+            node = child
+        if not node.values:
+            self._patterns += 1
+        node.values[value] = None
+
+    def match(self, routing_key: str) -> List[T]:
+        # Values in binding order, each once
+        matched: Dict[T, None] = {}
+        self._match(self._root, routing_key.split("."), 0, matched)
+        return list(matched)
+
+    def _match(self, node: _TopicNode[T], words: List[str], index: int,
+               matched: Dict[T, None]) -> None:
+        if index == len(words):
+            matched.update(node.values)
+
+        hash_node = node.children.get("#")
+        if hash_node is not None:
+            # "#" matches zero or more words
+            for rest in range(index, len(words) + 1):
+                self._match(hash_node, words, rest, matched)
+
+        if index == len(words):
+            return
+
+        star_node = node.children.get("*")
+        if star_node is not None:
+            self._match(star_node, words, index + 1, matched)
+
+        word_node = node.children.get(words[index])
+        if word_node is not None:
+            self._match(word_node, words, index + 1, matched)
+
+    def __repr__(self) -> str:
+        cls_name = self.__class__.__name__
+        return f"<{cls_name} patterns={self._patterns!r}>"
+
+
+class _HeadersBinding(Generic[T]):
+    __slots__ = ("value", "match_all", "size",)
+
+    def __init__(self, value: T, match_all: bool, size: int) -> None:
+        self.value = value
+        self.match_all = match_all
+        self.size = size
+
+
+class HeadersIndex(Generic[T]):
+    def __init__(self) -> None:
+        self._bindings: List[_HeadersBinding[T]] = []
+        # header name -> header value -> bindings requiring it
+        self._index: DefaultDict[str, DefaultDict[Hashable, List[int]]] = \
+            defaultdict(lambda: defaultdict(list))
+        # x-match=all bindings without headers match every message
+        self._match_every: List[int] = []
+
+    def add(self, arguments: Mapping[str, Any], value: T) -> None:
+        match_all = arguments.get("x-match", "all") != "any"
+        headers = {k: v for k, v in arguments.items() if not k.startswith("x-")}
+
+        binding_id = len(self._bindings)
+        self._bindings.append(_HeadersBinding(value, match_all, len(headers)))
+        if not headers and match_all:
+            self._match_every.append(binding_id)
+        for name, header_value in headers.items():
+            key = _ANY_VALUE if header_value is None else _get_key(header_value)
+            self._index[name][key].append(binding_id)
+
+    def match(self, headers: Mapping[str, Any]) -> List[T]:
+        # Only bindings sharing a header (and its value) with the message are evaluated
+        hits: Dict[int, int] = {binding_id: 0 for binding_id in self._match_every}
+        for name, header_value in headers.items():
+            values = self._index.get(name)
+            if values is None:
+                continue
+            for key in (_get_key(header_value), _ANY_VALUE):
+                for binding_id in values.get(key, ()):
+                    hits[binding_id] = hits.get(binding_id, 0) + 1
+
+        matched: Dict[T, None] = {}
+        for binding_id in sorted(hits):
+            binding = self._bindings[binding_id]
+            if hits[binding_id] >= (binding.size if binding.match_all else 1):
+                matched[binding.value] = None
+        return list(matched)
+
+    def __repr__(self) -> str:
+        cls_name = self.__class__.__name__
+        return f"<{cls_name} bindings={len(self._bindings)!r}>"
@@ -1,86 +1,402 @@
-from asyncio import Queue
-from collections import defaultdict
-from typing import AsyncGenerator, DefaultDict, Dict, List, Tuple
+from asyncio import Queue, QueueEmpty
+from collections import OrderedDict, defaultdict, deque
+from time import monotonic
+from typing import (
+    Any,
+    AsyncGenerator,
+    Awaitable,
+    Callable,
+    DefaultDict,
+    Deque,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 
 from ._message import Message, MessageStatus, QueuedMessage
+from ._routing import HeadersIndex, RoutingTable, TopicTrie
+
+# How many (exchange, routing key) -> queues results are kept
+ROUTE_CACHE_SIZE = 4096
+
+# Bound exchange (True) or queue (False) and its name
+_Destination = Tuple[bool, str]
+
+
+class _QueueLimits:
+    __slots__ = ("max_length", "max_length_bytes", "message_ttl", "enqueued_at", "size",)
+
+    def __init__(self, max_length: Optional[int], max_length_bytes: Optional[int],
+                 message_ttl: Optional[float]) -> None:
+        self.max_length = max_length
+        self.max_length_bytes = max_length_bytes
+        self.message_ttl = message_ttl
+        # Kept in step with the queue: enqueue times and total size of its messages
+        self.enqueued_at: Deque[float] = deque()
+        self.size = 0
+
+    @classmethod
+    def from_arguments(cls, arguments: Mapping[str, Any]) -> Optional['_QueueLimits']:
+        max_length = arguments.get("x-max-length")
+        max_length_bytes = arguments.get("x-max-length-bytes")
+        message_ttl = arguments.get("x-message-ttl")
+        if max_length is None and max_length_bytes is None and message_ttl is None:
+            return None
+        return cls(max_length, max_length_bytes,
+                   message_ttl / 1000 if message_ttl is not None else None)
+
+    def is_expired(self, enqueued_at: float, now: float) -> bool:
+        return self.message_ttl is not None and now - enqueued_at >= self.message_ttl
+
+    def get_eviction_reason(self, length: int, now: Optional[float]) -> Optional[str]:
+        # Expiry is only checked when there is a time to check it against
+        if now is not None and self.is_expired(self.enqueued_at[0], now):
+            return "message_ttl"
+        if self.max_length is not None and length > self.max_length:
+            return "max_length"
+        if self.max_length_bytes is not None and self.size > self.max_length_bytes:
+            return "max_length_bytes"
+        return None
 
 
 class Storage:
-    def __init__(self) -> None:
-        self._exchanges: Dict[str, List[Message]] = {}
+    def __init__(self, *, max_messages: Optional[int] = None,
+                 max_bytes: Optional[int] = None,
+                 max_exchange_messages: Optional[int] = None,
+                 max_history: Optional[int] = None) -> None:
+        # Append-only (oldest first), read newest first
+        self._exchanges: Dict[str, Deque[Message]] = {}
         self._exchange_types: Dict[str, str] = {}
         self._queues: Dict[str, Queue[Message]] = {}
-        self._history: List[Tuple[str, QueuedMessage]] = []
-        self._binds: DefaultDict[str, Dict[str, str]] = defaultdict(dict)
+        self._queue_limits: Dict[str, _QueueLimits] = {}
+        self._history: Deque[Tuple[str, QueuedMessage]] = deque()
+        # A message routed to several queues has an entry per queue
+        self._history_index: DefaultDict[str, List[QueuedMessage]] = defaultdict(list)
+        self._queue_history: DefaultDict[str, Deque[QueuedMessage]] = defaultdict(deque)
+        self._binds: DefaultDict[str, RoutingTable[_Destination]] = defaultdict(RoutingTable)
+        # Built from the binds on first use and kept up to date by later binds,
+        # the cache is dropped when topology changes
+        self._topic_tries: Dict[str, TopicTrie[_Destination]] = {}
+        self._route_cache: 'OrderedDict[Tuple[str, str], Tuple[str, ...]]' = OrderedDict()
+        self._headers_indexes: Dict[str, HeadersIndex[_Destination]] = {}
+        self._max_messages = max_messages
+        self._max_bytes = max_bytes
+        # Per exchange log and for the whole history, oldest entries are evicted first
+        self._max_exchange_messages = max_exchange_messages
+        self._max_history = max_history
+        self._evictions: DefaultDict[str, int] = defaultdict(int)
+        self._message_count = 0
+        self._message_bytes = 0
+        self._blocked = False
+        self._on_blocked: List[Callable[[bool], Awaitable[None]]] = []
+
+    @property
+    def blocked(self) -> bool:
+        return self._blocked
+
+    @property
+    def message_count(self) -> int:
+        return self._message_count
+
+    @property
+    def message_bytes(self) -> int:
+        return self._message_bytes
+
+    @property
+    def evictions(self) -> Dict[str, int]:
+        return dict(self._evictions)
+
+    def on_blocked(self, callback: Callable[[bool], Awaitable[None]]) -> 'Storage':
+        self._on_blocked.append(callback)
+        return self
+
+    def _get_size(self, message: Message) -> int:
+        # Sizes are only needed (and computed) when there is a byte budget
+        return message.size if self._max_bytes is not None else 0
+
+    async def _account(self, count: int, size: int) -> None:
+        # Only undelivered queue entries are charged to the budget, the exchange log
+        # is a record of what was published (bounded by max_exchange_messages)
+        self._message_count += count
+        self._message_bytes += size
+
+        blocked = ((self._max_messages is not None
+                    and self._message_count > self._max_messages)
+                   or (self._max_bytes is not None
+                       and self._message_bytes > self._max_bytes))
+        if blocked != self._blocked:
+            self._blocked = blocked
+            for callback in self._on_blocked:
+                await callback(blocked)
 
     async def clear(self) -> None:
         self._exchanges = {}
         self._exchange_types = {}
         self._queues = {}
-        self._history = []
-        self._binds = defaultdict(dict)
+        self._queue_limits = {}
+        self._history = deque()
+        self._history_index = defaultdict(list)
+        self._queue_history = defaultdict(deque)
+        self._binds = defaultdict(RoutingTable)
+        self._topic_tries = {}
+        self._route_cache.clear()
+        self._headers_indexes = {}
+        await self._account(-self._message_count, -self._message_bytes)
 
     async def add_message_to_exchange(self, exchange: str, message: Message) -> None:
+        await self.add_messages_to_exchange(exchange, [message])
+
+    async def add_messages_to_exchange(self, exchange: str, messages: List[Message]) -> None:
         await self.declare_exchange(exchange)
-        self._exchanges[exchange].insert(0, message)
+        log = self._exchanges[exchange]
+        log.extend(messages)
+        if self._max_exchange_messages is not None:
+            while len(log) > self._max_exchange_messages:
+                log.popleft()
+                self._evictions["exchange_log"] += 1
 
-        exchange_type = self._exchange_types[exchange]
-        binds = self._binds.get(exchange)
+        # Messages keep their order per queue
+        queued: DefaultDict[str, List[Message]] = defaultdict(list)
+        for message in messages:
+            for queue in self._route(exchange, message):
+                queued[queue].append(message)
+
+        for queue, queue_messages in queued.items():
+            await self.add_messages_to_queue(queue, queue_messages)
+
+    def _route(self, exchange: str, message: Message) -> Tuple[str, ...]:
+        # Final queues are cached per (exchange, routing key) unless they depend on headers
+        key = (exchange, message.routing_key)
+        queues = self._route_cache.get(key)
+        if queues is not None:
+            self._route_cache.move_to_end(key)
+            return queues
 
-        if binds:
-            if exchange_type == "direct":
-                routing_key = message.routing_key
+        routed: Dict[str, None] = {}
+        cacheable = self._route_exchange(exchange, message, routed, set())
+        queues = tuple(routed)
+        if cacheable:
+            self._route_cache[key] = queues
+            if len(self._route_cache) > ROUTE_CACHE_SIZE:
+                self._route_cache.popitem(last=False)
+        return queues
 
-                if routing_key in binds:
-                    await self.add_message_to_queue(binds[routing_key], message)
-            elif exchange_type == "fanout":
-                for queue in binds.values():
-                    await self.add_message_to_queue(queue, message)
+    def _route_exchange(self, exchange: str, message: Message,
+                        routed: Dict[str, None], visited: Set[str]) -> bool:
+        # Every exchange is visited once, which also makes bindings cycles safe
+        if exchange in visited:
+            return True
+        visited.add(exchange)
+
+        exchange_type = self._exchange_types.get(exchange, "direct")
+        cacheable = exchange_type != "headers"
+        for is_exchange, name in self._match(exchange, exchange_type, message):
+            if is_exchange:
+                cacheable = self._route_exchange(name, message, routed, visited) and cacheable
             else:
-                raise RuntimeError(f"{exchange_type} exchanges not supported")
+                routed[name] = None
+        return cacheable
+
+    def _match(self, exchange: str, exchange_type: str,
+               message: Message) -> Sequence[_Destination]:
+        if exchange_type == "headers":
+            index = self._headers_indexes.get(exchange)
+            if index is None:
+                return ()
+            return index.match((message.properties or {}).get("headers") or {})
+
+        binds = self._binds.get(exchange)
+        if not binds:
+            return ()
+
+        if exchange_type == "direct":
+            return binds.get(message.routing_key)
+        elif exchange_type == "fanout":
+            return binds.destinations
+        elif exchange_type == "topic":
+            trie = self._topic_tries.get(exchange)
+            if trie is None:
+                trie = self._topic_tries[exchange] = TopicTrie()
+                for pattern, destination in binds:
+                    trie.add(pattern, destination)
+            return trie.match(message.routing_key)
+        else:
+            raise RuntimeError(f"{exchange_type} exchanges not supported")
 
-    async def bind_queue_to_exchange(self, queue: str, exchange: str,
-                                     routing_key: str = "") -> None:
+    def _bind(self, exchange: str, destination: _Destination, routing_key: str,
+              arguments: Optional[Dict[str, Any]]) -> None:
+        self._binds[exchange].bind(routing_key, destination)
+        if self._exchange_types.get(exchange) == "headers":
+            if exchange not in self._headers_indexes:
+                self._headers_indexes[exchange] = HeadersIndex()
+            self._headers_indexes[exchange].add(arguments or {}, destination)
+        trie = self._topic_tries.get(exchange)
+        if trie is not None:
+            trie.add(routing_key, destination)
+        self._route_cache.clear()
+
+    async def bind_queue_to_exchange(self, queue: str, exchange: str, routing_key: str = "",
+                                     arguments: Optional[Dict[str, Any]] = None) -> None:
         await self.declare_queue(queue)
-        self._binds[exchange][routing_key] = queue
+        self._bind(exchange, (False, queue), routing_key, arguments)
+
+    async def bind_exchange_to_exchange(self, destination: str, source: str,
+                                        routing_key: str = "",
+                                        arguments: Optional[Dict[str, Any]] = None) -> None:
+        self._bind(source, (True, destination), routing_key, arguments)
 
     async def declare_exchange(self, exchange: str, exchange_type: str = "direct") -> None:
         if exchange not in self._exchanges:
-            self._exchanges[exchange] = []
+            self._exchanges[exchange] = deque()
             self._exchange_types[exchange] = exchange_type
+            self._route_cache.clear()
 
-    async def declare_queue(self, queue: str) -> None:
+    async def declare_queue(self, queue: str,
+                            arguments: Optional[Dict[str, Any]] = None) -> None:
         if queue not in self._queues:
             self._queues[queue] = Queue()
+            limits = _QueueLimits.from_arguments(arguments or {})
+            if limits:
+                self._queue_limits[queue] = limits
             await self.bind_queue_to_exchange(queue, exchange="", routing_key=queue)
 
     async def get_messages_from_exchange(self, exchange: str) -> List[Message]:
         if exchange not in self._exchanges:
             return []
-        return self._exchanges[exchange]
+        return list(reversed(self._exchanges[exchange]))
 
     async def delete_messages_from_exchange(self, exchange: str) -> None:
         if exchange in self._exchanges:
-            self._exchanges[exchange] = []
+            self._exchanges[exchange] = deque()
 
     async def add_message_to_queue(self, queue: str, message: Message) -> None:
+        await self.add_messages_to_queue(queue, [message])
+
+    async def add_messages_to_queue(self, queue: str, messages: List[Message]) -> None:
         await self.declare_queue(queue)
-        await self._queues[queue].put(message)
-        self._history.append((message.id, QueuedMessage(message, queue)))
+        limits = self._queue_limits.get(queue)
+        now = monotonic()
+        for message in messages:
+            self._queues[queue].put_nowait(message)
+            if limits:
+                limits.enqueued_at.append(now)
+                limits.size += message.size
+        queue_history = self._queue_history[queue]
+        for message in messages:
+            queued_message = QueuedMessage(message, queue)
+            self._history.append((message.id, queued_message))
+            self._history_index[message.id].append(queued_message)
+            queue_history.append(queued_message)
+        if self._max_history is not None:
+            self._evict_history(self._max_history)
+
+        # Not expired on enqueue: a consumer may be waiting for them already
+        evicted = self._evict_messages(queue, limits, expire=False) if limits else []
+        # Only the net change is charged, a full queue doesn't go over the budget on publish
+        await self._account(len(messages) - len(evicted),
+                            sum(map(self._get_size, messages))
+                            - sum(map(self._get_size, evicted)))
+
+    def _evict_history(self, max_history: int) -> None:
+        while len(self._history) > max_history:
+            message_id, queued_message = self._history.popleft()
+            entries = self._history_index[message_id]
+            entries.remove(queued_message)
+            if not entries:
+                del self._history_index[message_id]
+            # The oldest entry overall is also the oldest one of its queue
+            self._queue_history[queued_message.queue].popleft()
+            self._evictions["history"] += 1
+
+    def _evict_messages(self, queue: str, limits: _QueueLimits, *,
+                        expire: bool = True) -> List[Message]:
+        # Queue messages are ordered by enqueue time, so expired ones are at the head.
+        # Returns the evicted messages, the caller accounts for them
+        messages = self._queues[queue]
+        now = monotonic() if expire else None
+        evicted = []
+        while not messages.empty():
+            reason = limits.get_eviction_reason(messages.qsize(), now)
+            if reason is None:
+                break
+            message = messages.get_nowait()
+            messages.task_done()
+            limits.enqueued_at.popleft()
+            limits.size -= message.size
+            evicted.append(message)
+            self._evictions[reason] += 1
+        return evicted
+
+    async def _apply_queue_limits(self, queue: str) -> None:
+        limits = self._queue_limits.get(queue)
+        if limits:
+            evicted = self._evict_messages(queue, limits)
+            if evicted:
+                await self._account(-len(evicted), -sum(map(self._get_size, evicted)))
+
+    async def _dequeued(self, queue: str, message: Message) -> Optional[float]:
+        # Returns when the message was enqueued (if the queue tracks it)
+        enqueued_at = None
+        limits = self._queue_limits.get(queue)
+        if limits:
+            enqueued_at = limits.enqueued_at.popleft()
+            limits.size -= message.size
+        await self._account(-1, -self._get_size(message))
+        return enqueued_at
 
     async def get_history(self) -> List[QueuedMessage]:
-        return [message[1] for message in self._history[::-1]]
+        return [message[1] for message in reversed(self._history)]
+
+    async def get_queue_history(self, queue: str) -> List[QueuedMessage]:
+        if queue not in self._queue_history:
+            return []
+        return list(reversed(self._queue_history[queue]))
 
     async def change_message_status(self, message_id: str, status: MessageStatus) -> None:
-        for msg_id, message in self._history:
-            if msg_id == message_id:
-                message.set_status(status)
+        for message in self._history_index.get(message_id, ()):
+            message.set_status(status)
+
+    async def change_messages_status(self, message_ids: List[str],
+                                     status: MessageStatus) -> None:
+        for message_id in message_ids:
+            await self.change_message_status(message_id, status)
+
+    async def get_message_nowait(self, queue: str) -> Optional[Message]:
+        if queue not in self._queues:
+            return None
+        await self._apply_queue_limits(queue)
+        try:
+            message = self._queues[queue].get_nowait()
+        except QueueEmpty:
+            return None
+        self._queues[queue].task_done()
+        await self._dequeued(queue, message)
+        return message
+
+    async def get_queue_size(self, queue: str) -> int:
+        if queue not in self._queues:
+            return 0
+        await self._apply_queue_limits(queue)
+        return self._queues[queue].qsize()
 
     async def get_next_message(self, queue: str) -> AsyncGenerator[Message, None]:
         if queue not in self._queues:
             self._queues[queue] = Queue()
 
         while True:
+            # A message that arrives while the consumer waits is never expired
+            ready_at = monotonic()
             message = await self._queues[queue].get()
+            enqueued_at = await self._dequeued(queue, message)
+            limits = self._queue_limits.get(queue)
+            if limits and enqueued_at is not None and limits.is_expired(enqueued_at, ready_at):
+                # Expired before the consumer was ready for it
+                self._queues[queue].task_done()
+                self._evictions["message_ttl"] += 1
+                continue
             yield message
             self._queues[queue].task_done()
@@ -0,0 +1,167 @@
+import asyncio
+import multiprocessing
+import os
+from multiprocessing.connection import Connection
+from types import TracebackType
+from typing import Dict, List, Optional, Tuple, Type
+
+from aiohttp import web
+from aiohttp.web import json_response
+
+from ._mock_server import AmqpMockServer
+from ._storage import Storage
+from .amqp_server import AmqpServer
+from .http_server import HttpRoute, HttpServer, route
+
+__all__ = ("AmqpMockSupervisor",)
+
+_Ports = Tuple[int, int]
+
+
+def _get_port(base_port: int, index: int) -> int:
+    # Zero base port means "any free port" for every worker
+    return base_port + index if base_port else 0
+
+
+async def _serve_worker(conn: Connection, host: str, http_port: int, amqp_port: int) -> None:
+    storage = Storage()
+    mock = AmqpMockServer(HttpServer(storage, host, port=http_port),
+                          AmqpServer(storage, host, port=amqp_port))
+    async with mock:
+        conn.send((mock.http_server.port, mock.amqp_server.port))
+        try:
+            # Returns (or raises EOFError) when the supervisor stops or goes away
+            await asyncio.get_running_loop().run_in_executor(None, conn.recv)
+        except EOFError:
+            pass
+
+
+def _run_worker(conn: Connection, host: str, http_port: int, amqp_port: int) -> None:
+    try:
+        asyncio.run(_serve_worker(conn, host, http_port, amqp_port))
+    except KeyboardInterrupt:
+        pass
+
+
+class AmqpMockSupervisor:
+    def __init__(self, workers: Optional[int] = None, host: str = "0.0.0.0", port: int = 0, *,
+                 http_port: int = 0, amqp_port: int = 0) -> None:
+        self._workers = workers or os.cpu_count() or 1
+        self._host = host
+        self._port = port
+        self._http_port = http_port
+        self._amqp_port = amqp_port
+        self._context = multiprocessing.get_context("spawn")
+        self._processes: List[multiprocessing.process.BaseProcess] = []
+        self._conns: List[Connection] = []
+        self._ports: Dict[str, _Ports] = {}
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def host(self) -> str:
+        return self._host
+
+    @property
+    def port(self) -> int:
+        return self._port
+
+    @property
+    def workers(self) -> Dict[str, _Ports]:
+        return dict(self._ports)
+
+    @route("GET", "/healthcheck")
+    async def healthcheck(self, request: web.Request) -> web.Response:
+        return json_response("200 OK")
+
+    @route("GET", "/workers")
+    async def get_workers(self, request: web.Request) -> web.Response:
+        return json_response({
+            worker_id: self._to_dict(ports) for worker_id, ports in self._ports.items()
+        })
+
+    @route("GET", "/workers/{worker_id}")
+    async def get_worker(self, request: web.Request) -> web.Response:
+        ports = self._ports.get(request.match_info["worker_id"])
+        if ports is None:
+            raise web.HTTPNotFound()
+        return json_response(self._to_dict(ports))
+
+    def _to_dict(self, ports: _Ports) -> Dict[str, int]:
+        http_port, amqp_port = ports
+        return {"http_port": http_port, "amqp_port": amqp_port}
+
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        for index in range(self._workers):
+            parent_conn, child_conn = self._context.Pipe()
+            process = self._context.Process(target=_run_worker, daemon=True, args=(
+                child_conn, self._host,
+                _get_port(self._http_port, index), _get_port(self._amqp_port, index),
+            ))
+            process.start()
+            child_conn.close()
+            self._processes += [process]
+            self._conns += [parent_conn]
+
+        try:
+            for index, conn in enumerate(self._conns):
+                # Worker ids follow pytest-xdist naming
+                self._ports[f"gw{index}"] = await loop.run_in_executor(None, conn.recv)
+        except EOFError:
+            await self.stop()
+            raise RuntimeError("Failed to start amqp mock worker") from None
+
+        app = web.Application()
+        routes: List[web.RouteDef] = []
+        for name in dir(self):
+            handler = getattr(self, name)
+            http_route = HttpRoute.get_route(handler)
+            if http_route:
+                routes += [web.route(http_route.method, http_route.path, handler)]
+        app.add_routes(routes)
+
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+
+        site = web.TCPSite(self._runner, host=self._host, port=self._port)
+        await site.start()
+        self._port = self._runner.addresses[0][1]
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+        loop = asyncio.get_running_loop()
+        for conn in self._conns:
+            conn.close()
+        for process in self._processes:
+            await loop.run_in_executor(None, process.join, 5.0)
+            if process.is_alive():
+                process.terminate()
+        self._conns.clear()
+        self._processes.clear()
+        self._ports.clear()
+
+    def __enter__(self) -> None:
+        raise TypeError("Use async with instead")
+
+    def __exit__(self,
+                 exc_type: Optional[Type[BaseException]],
+                 exc_val: Optional[BaseException],
+                 exc_tb: Optional[TracebackType]) -> None:
+        pass
+
+    async def __aenter__(self) -> 'AmqpMockSupervisor':
+        await self.start()
+        return self
+
+    async def __aexit__(self,
+                        exc_type: Optional[Type[BaseException]],
+                        exc_val: Optional[BaseException],
+                        exc_tb: Optional[TracebackType]) -> None:
+        await self.stop()
+
+    def __repr__(self) -> str:
+        cls_name = self.__class__.__name__
+        return f"<{cls_name} workers={self._workers!r} host={self._host!r} port={self._port!r}>"
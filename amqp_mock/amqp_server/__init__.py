@@ -1,6 +1,13 @@
+from ._amqp_channel import AmqpChannel, AmqpConsumer
 from ._amqp_connection import AmqpConnection
+from ._amqp_metrics import AmqpMetrics, LatencyHistogram
+from ._amqp_recorder import INBOUND, OUTBOUND, AmqpRecorder, read_recording
+from ._amqp_replay import ReplayResult, replay_recording
 from ._amqp_runner import AmqpRunner
 from ._amqp_server import AmqpServer
 from ._amqp_site import AmqpSite
+from ._amqp_wire_tap import WireTap
 
-__all__ = ("AmqpConnection", "AmqpRunner", "AmqpServer", "AmqpSite",)
+__all__ = ("AmqpChannel", "AmqpConnection", "AmqpConsumer", "AmqpMetrics", "AmqpRecorder",
+           "AmqpRunner", "AmqpServer", "AmqpSite", "LatencyHistogram", "ReplayResult",
+           "WireTap", "read_recording", "replay_recording", "INBOUND", "OUTBOUND",)
@@ -0,0 +1,268 @@
+from asyncio import Event
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .._message import Message
+
+__all__ = ("AmqpChannel", "AmqpConsumer",)
+
+# no_ack deliveries are settled on send, only the latest ones are kept
+# so that a (tolerated) late ack can still update the message status
+AUTO_ACKED_LIMIT = 1024
+
+
+class AmqpConsumer:
+    __slots__ = ("consumer_tag", "no_ack", "prefetch_count", "unacked",)
+
+    def __init__(self, consumer_tag: str, *, no_ack: bool = False,
+                 prefetch_count: int = 0) -> None:
+        self.consumer_tag = consumer_tag
+        self.no_ack = no_ack
+        self.prefetch_count = prefetch_count
+        self.unacked = 0
+
+    def __repr__(self) -> str:
+        cls_name = self.__class__.__name__
+        return (f"<{cls_name} consumer_tag={self.consumer_tag!r} "
+                f"unacked={self.unacked!r} prefetch_count={self.prefetch_count!r}>")
+
+
+_Delivery = Tuple[str, AmqpConsumer]
+_Deliveries = List[Tuple[int, _Delivery]]
+# Deliveries settled within a transaction: tracked and auto-acked ones, acked or not
+_TxSettle = Tuple[_Deliveries, _Deliveries, bool]
+
+
+class AmqpChannel:
+    def __init__(self, channel_id: int) -> None:
+        self._channel_id = channel_id
+        self._prefetch_count = 0
+        self._global_prefetch_count = 0
+        self._unacked = 0
+        self._delivery_tag = 0
+        self._confirm_mode = False
+        self._publish_seq = 0
+        self._confirmed_seq = 0
+        self._tx_mode = False
+        self._tx_publishes: List[Message] = []
+        self._tx_settles: List[_TxSettle] = []
+        self._consumers: Dict[str, AmqpConsumer] = {}
+        # Basic.Get deliveries are accounted as if made by these (unlimited) consumers
+        self._get_consumers = {
+            no_ack: AmqpConsumer("", no_ack=no_ack) for no_ack in (False, True)
+        }
+        self._incoming_message: Optional[Message] = None
+        self._incoming_body = bytearray()
+        self._incoming_body_size = 0
+        self._incoming_body_received = 0
+        # Ordered by delivery tag, so multiple=True releases a prefix of the dict
+        self._deliveries: 'OrderedDict[int, _Delivery]' = OrderedDict()
+        self._auto_acked: 'OrderedDict[int, _Delivery]' = OrderedDict()
+        self._credit = Event()
+
+    @property
+    def channel_id(self) -> int:
+        return self._channel_id
+
+    @property
+    def unacked(self) -> int:
+        return self._unacked
+
+    @property
+    def consumer_tags(self) -> List[str]:
+        return list(self._consumers)
+
+    @property
+    def confirm_mode(self) -> bool:
+        return self._confirm_mode
+
+    def select_confirm(self) -> None:
+        self._confirm_mode = True
+
+    def next_publish_seq(self) -> int:
+        self._publish_seq += 1
+        return self._publish_seq
+
+    def pop_unconfirmed(self) -> Tuple[int, int]:
+        # Returns the last publish sequence number and how many are not confirmed yet
+        count = self._publish_seq - self._confirmed_seq
+        self._confirmed_seq = self._publish_seq
+        return self._publish_seq, count
+
+    @property
+    def tx_mode(self) -> bool:
+        return self._tx_mode
+
+    def select_tx(self) -> None:
+        self._tx_mode = True
+
+    def add_tx_publish(self, message: Message) -> None:
+        self._tx_publishes.append(message)
+
+    def add_tx_settle(self, delivery_tag: int, multiple: bool, acked: bool) -> None:
+        # Settled deliveries keep holding their credit until the commit
+        released, auto_acked = self._take_deliveries(delivery_tag, multiple)
+        self._tx_settles.append((released, auto_acked, acked))
+
+    def pop_tx(self) -> Tuple[List[Message], List[str], List[str]]:
+        acked_ids: List[str] = []
+        nacked_ids: List[str] = []
+        for released, auto_acked, acked in self._tx_settles:
+            self._release(released)
+            message_ids = acked_ids if acked else nacked_ids
+            message_ids.extend(message_id for _, (message_id, _) in released + auto_acked)
+        messages = self._tx_publishes
+        self._tx_publishes, self._tx_settles = [], []
+        return messages, acked_ids, nacked_ids
+
+    def rollback_tx(self) -> None:
+        # Settled deliveries are outstanding again and can be settled once more
+        if self._tx_settles:
+            for released, auto_acked, _ in self._tx_settles:
+                self._deliveries.update(released)
+                self._auto_acked.update(auto_acked)
+            self._deliveries = OrderedDict(sorted(self._deliveries.items()))
+            self._auto_acked = OrderedDict(sorted(self._auto_acked.items()))
+        self._tx_publishes, self._tx_settles = [], []
+
+    def set_qos(self, prefetch_count: int, global_: bool = False) -> None:
+        # Like RabbitMQ: per-consumer limit applies to consumers started afterwards,
+        # global limit is shared by all consumers of the channel
+        if global_:
+            self._global_prefetch_count = prefetch_count
+        else:
+            self._prefetch_count = prefetch_count
+        self._credit.set()
+
+    def add_consumer(self, consumer_tag: str, *, no_ack: bool = False) -> AmqpConsumer:
+        consumer = AmqpConsumer(consumer_tag, no_ack=no_ack, prefetch_count=self._prefetch_count)
+        self._consumers[consumer_tag] = consumer
+        return consumer
+
+    def get_consumer(self, no_ack: bool = False) -> AmqpConsumer:
+        return self._get_consumers[no_ack]
+
+    def remove_consumer(self, consumer_tag: str) -> None:
+        self._consumers.pop(consumer_tag, None)
+
+    def has_credit(self, consumer: AmqpConsumer) -> bool:
+        if consumer.no_ack:
+            return True
+        if 0 < consumer.prefetch_count <= consumer.unacked:
+            return False
+        if 0 < self._global_prefetch_count <= self._unacked:
+            return False
+        return True
+
+    async def wait_for_credit(self, consumer: AmqpConsumer) -> None:
+        while not self.has_credit(consumer):
+            self._credit.clear()
+            await self._credit.wait()
+
+    def start_publish(self, exchange: str, routing_key: str) -> None:
+        self._incoming_message = Message(exchange=exchange, routing_key=routing_key)
+        self._incoming_body_size = 0
+        self._incoming_body_received = 0
+
+    def add_content_header(self, body_size: int,
+                           properties: Dict[str, Any]) -> Optional[Message]:
+        if self._incoming_message is None:
+            return None
+        self._incoming_message.properties = properties
+        self._incoming_body_size = body_size
+        if body_size == 0:
+            return self._complete_publish(b"")
+        return None
+
+    def add_content_body(self, value: bytes) -> Optional[Message]:
+        if self._incoming_message is None:
+            # e.g. an empty body frame sent after a zero-sized header
+            return None
+
+        offset = self._incoming_body_received
+        if offset == 0 and len(value) >= self._incoming_body_size:
+            # Whole body in a single frame, no need to copy it
+            return self._complete_publish(value)
+
+        if offset == 0:
+            self._incoming_body = bytearray(self._incoming_body_size)
+        self._incoming_body[offset:offset + len(value)] = value
+        self._incoming_body_received = offset + len(value)
+
+        if self._incoming_body_received < self._incoming_body_size:
+            return None
+        # The assembled buffer is handed over as the body, not copied
+        body, self._incoming_body = self._incoming_body, bytearray()
+        return self._complete_publish(body)
+
+    def _complete_publish(self, body: bytes) -> Optional[Message]:
+        message, self._incoming_message = self._incoming_message, None
+        self._incoming_body_received = 0
+        if message:
+            message.body = body
+        return message
+
+    def next_delivery_tag(self) -> int:
+        self._delivery_tag += 1
+        return self._delivery_tag
+
+    def track_delivery(self, delivery_tag: int, message_id: str,
+                       consumer: AmqpConsumer) -> None:
+        if consumer.no_ack:
+            self._auto_acked[delivery_tag] = (message_id, consumer)
+            if len(self._auto_acked) > AUTO_ACKED_LIMIT:
+                self._auto_acked.popitem(last=False)
+        else:
+            self._deliveries[delivery_tag] = (message_id, consumer)
+            consumer.unacked += 1
+            self._unacked += 1
+
+    def release_deliveries(self, delivery_tag: int, multiple: bool = False) -> List[str]:
+        released, auto_acked = self._take_deliveries(delivery_tag, multiple)
+        self._release(released)
+        return [message_id for _, (message_id, _) in released + auto_acked]
+
+    def _take_deliveries(self, delivery_tag: int,
+                         multiple: bool) -> Tuple[_Deliveries, _Deliveries]:
+        if multiple:
+            return (self._pop_until(self._deliveries, delivery_tag),
+                    self._pop_until(self._auto_acked, delivery_tag))
+        return (self._pop(self._deliveries, delivery_tag),
+                self._pop(self._auto_acked, delivery_tag))
+
+    def _release(self, released: _Deliveries) -> None:
+        for _, (_, consumer) in released:
+            consumer.unacked -= 1
+        if released:
+            self._unacked -= len(released)
+            self._credit.set()
+
+    def _pop(self, deliveries: 'OrderedDict[int, _Delivery]',
+             delivery_tag: int) -> _Deliveries:
+        delivery = deliveries.pop(delivery_tag, None)
+        return [(delivery_tag, delivery)] if delivery else []
+
+    def _pop_until(self, deliveries: 'OrderedDict[int, _Delivery]',
+                   delivery_tag: int) -> _Deliveries:
+        # Zero tag with multiple=True means "everything outstanding"
+        released = []
+        while deliveries:
+            tag = next(iter(deliveries))
+            if delivery_tag and tag > delivery_tag:
+                break
+            released.append(deliveries.popitem(last=False))
+        return released
+
+    def clear(self) -> None:
+        self._incoming_message = None
+        self._incoming_body = bytearray()
+        self._consumers.clear()
+        self._deliveries.clear()
+        self._auto_acked.clear()
+        self._tx_publishes, self._tx_settles = [], []
+        self._unacked = 0
+        self._credit.set()
+
+    def __repr__(self) -> str:
+        cls_name = self.__class__.__name__
+        return f"<{cls_name} channel_id={self._channel_id!r} unacked={self._unacked!r}>"
@@ -1,57 +1,163 @@
-import json
 import logging
-from asyncio import CancelledError, Task, create_task, gather
+import struct
+from asyncio import (
+    FIRST_COMPLETED,
+    CancelledError,
+    Event,
+    Task,
+    create_task,
+    current_task,
+    gather,
+    get_running_loop,
+    sleep,
+    wait,
+)
 from asyncio.streams import StreamReader, StreamWriter
-from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, Optional, Tuple, Union
+from time import perf_counter
+from typing import (
+    Any,
+    AsyncGenerator,
+    Awaitable,
+    Callable,
+    ClassVar,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    Union,
+    cast,
+)
 
 from pamqp import base, commands
 from pamqp.body import ContentBody
-from pamqp.constants import FRAME_END
+from pamqp.constants import (
+    AMQP,
+    FRAME_BODY,
+    FRAME_HEADER,
+    FRAME_HEADER_SIZE,
+    FRAME_HEARTBEAT,
+    FRAME_MAX_SIZE,
+)
 from pamqp.exceptions import UnmarshalingException
-from pamqp.frame import FrameTypes, marshal, unmarshal
+from pamqp.frame import marshal, unmarshal
 from pamqp.header import ContentHeader, ProtocolHeader
 from pamqp.heartbeat import Heartbeat
 
 from .._message import Message
+from ._amqp_channel import AmqpChannel, AmqpConsumer
+from ._amqp_metrics import AmqpMetrics
+from ._amqp_recorder import INBOUND, OUTBOUND, AmqpRecorder
+from ._amqp_wire_tap import WireTap
 
 __all__ = ("AmqpConnection",)
 
 _logger = logging.getLogger("amqp_mock")
 
+_READ_CHUNK_SIZE = 2 ** 16
+# Frames held back from a blocked connection before it is not read from at all
+_BLOCKED_READ_LIMIT = 2 ** 20
+WRITE_HIGH_WATER = 2 ** 16
+FRAME_MAX = FRAME_MAX_SIZE
+HEARTBEAT = 60
+# Frame header + frame end octet
+_FRAME_OVERHEAD = FRAME_HEADER_SIZE + 1
+_PROTOCOL_HEADER_SIZE = 8
+_FRAME_HEADER = struct.Struct(">BHI")
+
 AnyFrame = Union[base.Frame, ContentHeader, ContentBody, ProtocolHeader, Heartbeat]
 
+# Method frames are keyed by their class-id + method-id (pamqp index),
+# other frames by their frame type
+_PROTOCOL_HEADER = 0
+_FRAME_KEYS: Dict[Type[Any], int] = {
+    ProtocolHeader: _PROTOCOL_HEADER,
+    ContentHeader: FRAME_HEADER,
+    ContentBody: FRAME_BODY,
+    Heartbeat: FRAME_HEARTBEAT,
+}
+# Receives the destination (queue or exchange), source exchange, routing key
+# and binding arguments
+_OnBind = Callable[[str, str, str, Dict[str, Any]], Awaitable[None]]
+# Returns the message and the number of messages left in the queue
+_OnGet = Callable[[str], Awaitable[Optional[Tuple[Message, int]]]]
+# Receives the published messages, acked and nacked message ids of a transaction
+_OnCommit = Callable[[List[Message], List[str], List[str]], Awaitable[None]]
+
+PRECONDITION_FAILED = 406
+FRAME_ERROR = 501
+
+_BASIC_PUBLISH = commands.Basic.Publish.index
+_BASIC_ACK = commands.Basic.Ack.index
+
+
+class _FrameError(Exception):
+    pass
+
 
 class AmqpConnection:
     def __init__(self, reader: StreamReader, writer: StreamWriter,
                  on_consume: Callable[[str], AsyncGenerator[Message, None]],
-                 server_properties: Dict[str, Any]) -> None:
+                 server_properties: Dict[str, Any], *,
+                 write_high_water: int = WRITE_HIGH_WATER,
+                 frame_max: int = FRAME_MAX,
+                 heartbeat: int = HEARTBEAT,
+                 recorder: Optional[AmqpRecorder] = None) -> None:
         self._stream_reader = reader
         self._stream_writer = writer
+        self._recorder = recorder
         self._server_properties = server_properties
+        self._write_buffer = bytearray()
+        self._write_high_water = write_high_water
+        self._frame_max = frame_max
+        self._heartbeat = heartbeat
+        self._heartbeat_monitor: Optional[Task[None]] = None
+        self._last_received = self._last_sent = get_running_loop().time()
+        self._reaped = False
+        self._closed = False
+        self._close_event = Event()
+        self._client_capabilities: Dict[str, Any] = {}
+        self._publisher = False
+        self._blocked = False
+        self._blocked_notified = False
+        self._reading = Event()
+        self._reading.set()
+        self._read_paused = False
         self._reader = create_task(self._reader_task(reader))
+        self._channels: Dict[int, AmqpChannel] = {}
         self._consumers: Dict[Tuple[int, str], Task[Any]] = {}
-        self._delivered_messages: Dict[int, str] = {}
-        self._incoming_message: Union[Message, None] = None
-        self._delivery_tag = 0
+        self._unconfirmed_channels: Set[int] = set()
+        self._metrics = AmqpMetrics()
+        self._wire_tap: Optional[WireTap] = None
         self._on_consume = on_consume
-        self._on_bind: Optional[Callable[[str, str, str], Awaitable[None]]] = None
+        self._on_bind: Optional[_OnBind] = None
+        self._on_bind_exchange: Optional[_OnBind] = None
         self._on_declare_exchange: Optional[Callable[[str, str], Awaitable[None]]] = None
-        self._on_declare_queue: Optional[Callable[[str], Awaitable[None]]] = None
+        self._on_declare_queue: Optional[
+            Callable[[str, Dict[str, Any]], Awaitable[None]]] = None
         self._on_publish: Optional[Callable[[Message], Awaitable[None]]] = None
         self._on_ack: Optional[Callable[[str], Awaitable[None]]] = None
         self._on_nack: Optional[Callable[[str], Awaitable[None]]] = None
+        self._on_get: Optional[_OnGet] = None
+        self._on_commit: Optional[_OnCommit] = None
         self._on_close: Optional[Callable[['AmqpConnection'], Awaitable[None]]] = None
 
-    def on_bind(self, callback: Callable[[str, str, str], Awaitable[None]]) -> 'AmqpConnection':
+    def on_bind(self, callback: _OnBind) -> 'AmqpConnection':
         self._on_bind = callback
         return self
 
+    def on_bind_exchange(self, callback: _OnBind) -> 'AmqpConnection':
+        self._on_bind_exchange = callback
+        return self
+
     def on_declare_exchange(self, callback: Callable[[str, str],
                                                      Awaitable[None]]) -> 'AmqpConnection':
         self._on_declare_exchange = callback
         return self
 
-    def on_declare_queue(self, callback: Callable[[str], Awaitable[None]]) -> 'AmqpConnection':
+    def on_declare_queue(self, callback: Callable[[str, Dict[str, Any]], Awaitable[None]]
+                         ) -> 'AmqpConnection':
         self._on_declare_queue = callback
         return self
 
@@ -67,14 +173,76 @@ class AmqpConnection:
         self._on_nack = callback
         return self
 
+    def on_get(self, callback: _OnGet) -> 'AmqpConnection':
+        self._on_get = callback
+        return self
+
+    def on_commit(self, callback: _OnCommit) -> 'AmqpConnection':
+        self._on_commit = callback
+        return self
+
     def on_close(self,
                  callback: Callable[['AmqpConnection'], Awaitable[None]]) -> 'AmqpConnection':
         self._on_close = callback
         return self
 
-    def _get_delivery_tag(self) -> int:
-        self._delivery_tag += 1
-        return self._delivery_tag
+    @property
+    def peername(self) -> str:
+        host, port, *_ = self._stream_writer.get_extra_info("peername") or ("", 0)
+        return f"{host}:{port}"
+
+    @property
+    def metrics(self) -> AmqpMetrics:
+        return self._metrics
+
+    @property
+    def wire_tap(self) -> Optional[WireTap]:
+        return self._wire_tap
+
+    def set_wire_tap(self, size: int) -> None:
+        # Zero size turns the wire tap off
+        self._wire_tap = WireTap(size) if size > 0 else None
+
+    @property
+    def reaped(self) -> bool:
+        return self._reaped
+
+    async def set_blocked(self, blocked: bool) -> None:
+        self._blocked = blocked
+        await self._apply_flow_control()
+
+    async def _apply_flow_control(self) -> None:
+        # Only publishing connections are blocked, and they are not read from meanwhile
+        if self._blocked and self._publisher and self._reading.is_set():
+            self._reading.clear()
+            if self._client_capabilities.get("connection.blocked"):
+                await self._send_frame(0, commands.Connection.Blocked(reason="memory"))
+                await self._flush()
+                self._blocked_notified = True
+        elif not self._blocked and not self._reading.is_set():
+            if self._blocked_notified:
+                await self._send_frame(0, commands.Connection.Unblocked())
+                await self._flush()
+                self._blocked_notified = False
+            self._reading.set()
+
+    def _get_channel(self, channel_id: int) -> AmqpChannel:
+        channel = self._channels.get(channel_id)
+        if channel is None:
+            channel = self._channels[channel_id] = AmqpChannel(channel_id)
+        return channel
+
+    async def _send_confirms(self) -> None:
+        # Publishes pipelined within one read batch are confirmed with a single multiple ack
+        for channel_id in self._unconfirmed_channels:
+            channel = self._channels.get(channel_id)
+            if channel is None:
+                continue
+            delivery_tag, count = channel.pop_unconfirmed()
+            if count > 0:
+                frame_out = commands.Basic.Ack(delivery_tag=delivery_tag, multiple=count > 1)
+                await self._send_frame(channel_id, frame_out)
+        self._unconfirmed_channels.clear()
 
     async def _cancel_consumer(self, channel_id: int, consumer_tag: str) -> None:
         consumer_key = (channel_id, consumer_tag)
@@ -91,57 +259,187 @@ class AmqpConnection:
             pass
 
         del self._consumers[consumer_key]
+        channel = self._channels.get(channel_id)
+        if channel:
+            channel.remove_consumer(consumer_tag)
 
-    async def close(self) -> None:
+    async def _close_channel(self, channel_id: int) -> None:
+        channel = self._channels.pop(channel_id, None)
+        if channel is None:
+            return
         tasks = [self._cancel_consumer(channel_id, consumer_tag)
-                 for channel_id, consumer_tag in self._consumers]
+                 for consumer_tag in channel.consumer_tags]
+        await gather(*tasks, return_exceptions=True)
+        channel.clear()
+
+    async def _close_channels(self) -> None:
+        tasks = [self._close_channel(channel_id) for channel_id in list(self._channels)]
         await gather(*tasks, return_exceptions=True)
 
+    async def close(self) -> None:
+        if self._closed:
+            # The reader must not wait, the ongoing close is waiting for it
+            if current_task() is not self._reader:
+                await self._close_event.wait()
+            return
+        self._closed = True
+        try:
+            await self._close()
+        finally:
+            self._close_event.set()
+
+    async def _close(self) -> None:
+        if self._heartbeat_monitor and self._heartbeat_monitor is not current_task():
+            self._heartbeat_monitor.cancel()
+            await gather(self._heartbeat_monitor, return_exceptions=True)
+
+        await self._close_channels()
+
+        await self._flush()
         self._stream_writer.close()
-        await self._stream_writer.wait_closed()
+        try:
+            await self._stream_writer.wait_closed()
+        except ConnectionError:
+            pass
+
+        if self._reader is not current_task():
+            self._stream_reader.feed_eof()
+            if self._read_paused:
+                # Waits for an unblock that is not coming, there is nothing to finish
+                self._reader.cancel()
+            await gather(self._reader, return_exceptions=True)
 
-        self._stream_reader.feed_eof()
-        await self._reader
+        if self._recorder:
+            self._recorder.close()
 
         if self._on_close:
             await self._on_close(self)
 
-    async def _unmarshal(self, buffer: bytes) -> Tuple[int, int, FrameTypes]:
-        # Workaround for pamqp bug:
-        #   Heartbeat can be unmarshaled successfully even without FRAME_END.
-        #   this shouldn't happen according to spec
-
-        byte_count, channel_id, frame = unmarshal(buffer)
-        if frame.name == Heartbeat.name and buffer[-1] != FRAME_END:
-            raise UnmarshalingException()
-
-        return byte_count, channel_id, frame
+    def _get_frame_end(self, buffer: bytearray, offset: int) -> Optional[int]:
+        if len(buffer) - offset < FRAME_HEADER_SIZE:
+            return None
+        if buffer.startswith(AMQP, offset):
+            return offset + _PROTOCOL_HEADER_SIZE
+        frame_size: int = _FRAME_HEADER.unpack_from(buffer, offset)[2]
+        return offset + FRAME_HEADER_SIZE + frame_size + 1
+
+    async def _process_buffer(self, buffer: bytearray) -> int:
+        offset = 0
+        metrics = self._metrics
+        debug = _logger.isEnabledFor(logging.DEBUG)
+        with memoryview(buffer) as view:
+            while True:
+                frame_end = self._get_frame_end(buffer, offset)
+                if frame_end is None:
+                    return offset
+                if self._frame_max and frame_end - offset > self._frame_max:
+                    # Checked before the frame is buffered, the size could be anything
+                    raise _FrameError(f"frame size {frame_end - offset} "
+                                      f"exceeds frame_max {self._frame_max}")
+                if frame_end > len(buffer):
+                    return offset
+                _, channel_id, frame = unmarshal(bytes(view[offset:frame_end]))
+                offset = frame_end
+
+                if debug:
+                    _logger.debug("<- %s %s", frame.name, channel_id)
+                if self._wire_tap is not None:
+                    self._wire_tap.record("<-", channel_id, frame)
+                started_at = perf_counter()
+                await self.dispatch_frame(frame, channel_id)
+                metrics.observe(frame.name, perf_counter() - started_at)
+                metrics.frames_received += 1
+
+    async def _read_chunk(self, reader: StreamReader, held: int) -> Optional[bytes]:
+        # Returns None when the connection got unblocked before any data arrived
+        if self._reading.is_set():
+            return await reader.read(_READ_CHUNK_SIZE)
+
+        if held >= _BLOCKED_READ_LIMIT:
+            # Enough is held back, the client is throttled by TCP until unblocked
+            self._read_paused = True
+            try:
+                await self._reading.wait()
+            finally:
+                self._read_paused = False
+            return None
+
+        # Blocked connections are still read (but not processed) to see heartbeats and EOF
+        read = create_task(reader.read(_READ_CHUNK_SIZE))
+        unblocked = create_task(self._reading.wait())
+        try:
+            await wait({read, unblocked}, return_when=FIRST_COMPLETED)
+        finally:
+            unblocked.cancel()
+            if not read.done():
+                read.cancel()
+            await gather(read, unblocked, return_exceptions=True)
+        return None if read.cancelled() else read.result()
 
     async def _reader_task(self, reader: StreamReader) -> None:
-        buffer = b""
+        buffer = bytearray()
         while not reader.at_eof():
-            chunk = await reader.read(1)
-            if not chunk:
-                break
-            buffer += chunk
-            try:
-                byte_count, channel_id, frame = await self._unmarshal(buffer)
-            except UnmarshalingException:
+            chunk = await self._read_chunk(reader, len(buffer))
+            if chunk is not None:
+                if not chunk:
+                    break
+                self._last_received = get_running_loop().time()
+                self._metrics.bytes_received += len(chunk)
+                if self._recorder:
+                    self._recorder.record(INBOUND, chunk)
+                buffer += chunk
+            if not self._reading.is_set():
                 continue
-            else:
-                buffer = b""
-
-            _logger.debug(f"<- {frame.name} {channel_id}")
-            await self.dispatch_frame(frame, channel_id)
-
-    async def _consumer_task(self, queue_name: str, consumer_tag: str, channel_id: int) -> None:
-        _logger.debug(f"* New consumer {consumer_tag}")
-
+            try:
+                offset = await self._process_buffer(buffer)
+            except UnmarshalingException as exception:
+                _logger.error(f"Failed to unmarshal frame: {exception}")
+                break
+            except _FrameError as exception:
+                _logger.error(f"Frame error: {exception}")
+                frame_out = commands.Connection.Close(reply_code=FRAME_ERROR,
+                                                      reply_text=f"FRAME_ERROR - {exception}",
+                                                      class_id=0, method_id=0)
+                await self._send_frame(0, frame_out)
+                break
+            finally:
+                await self._send_confirms()
+                await self._flush()
+            del buffer[:offset]
+
+        # Client has gone away (or sent garbage), release everything it holds
+        await self.close()
+
+    async def _heartbeat_task(self, interval: int) -> None:
+        loop = get_running_loop()
+        while True:
+            await sleep(interval / 2)
+            now = loop.time()
+            if self._read_paused and not self._stream_writer.transport.is_closing():
+                # Heartbeats of a paused connection are not read, it is alive for as long
+                # as the heartbeats sent to it go through (a write to a dead peer fails)
+                self._last_received = now
+            if now - self._last_received > interval * 2:
+                _logger.warning(f"Missed heartbeats from client, closing {self!r}")
+                self._reaped = True
+                await self.close()
+                return
+            if now - self._last_sent >= interval / 2:
+                await self._send_frame(0, Heartbeat())
+                await self._flush()
+
+    async def _consumer_task(self, queue_name: str, consumer: AmqpConsumer,
+                             channel: AmqpChannel) -> None:
+        consumer_tag = consumer.consumer_tag
+        channel_id = channel.channel_id
+        _logger.debug("* New consumer %s", consumer_tag)
+
+        await channel.wait_for_credit(consumer)
         async for message in self._on_consume(queue_name):
-            _logger.debug(f"--> Message {message}")
+            _logger.debug("--> Message %s", message.id)
 
-            delivery_tag = self._get_delivery_tag()
-            self._delivered_messages[delivery_tag] = message.id
+            delivery_tag = channel.next_delivery_tag()
+            channel.track_delivery(delivery_tag, message.id, consumer)
 
             frame_out = commands.Basic.Deliver(
                 consumer_tag=consumer_tag,
@@ -149,50 +447,71 @@ class AmqpConnection:
                 exchange=message.exchange,
                 routing_key=message.routing_key,
             )
-            await self._send_frame(channel_id, frame_out)
+            await self._send_message(channel_id, frame_out, message)
+            self._metrics.delivered += 1
+            await self._flush()
 
-            encoded = json.dumps(message.value).encode()
-            properties = commands.Basic.Properties(**(message.properties or {}))
-            header = ContentHeader(body_size=len(encoded), properties=properties)
-            body = ContentBody(encoded)
-            await self._send_frame(channel_id, header)
-            await self._send_frame(channel_id, body)
+            await channel.wait_for_credit(consumer)
 
     async def dispatch_frame(self, frame: AnyFrame, channel_id: int) -> Any:
-        handlers: Dict[str, Callable[[int, Any], Any]] = {
-            Heartbeat.name: self._send_heartbeat,
-            ProtocolHeader.name: self._send_connection_start,
-            ContentHeader.name: self._handle_content_header,
-            ContentBody.name: self._handle_content_body,
-            commands.Connection.StartOk.name: self._send_connection_tune,
-            commands.Connection.TuneOk.name: self._do_nothing,
-            commands.Connection.Open.name: self._send_connection_open_ok,
-            commands.Connection.Close.name: self._send_connection_close_ok,
-            commands.Channel.Open.name: self._send_channel_open_ok,
-            commands.Channel.Close.name: self._send_channel_close_ok,
-            commands.Confirm.Select.name: self._send_confirm_select_ok,
-            commands.Queue.Declare.name: self._send_queue_declare_ok,
-            commands.Exchange.Declare.name: self._send_exchange_declare_ok,
-            commands.Queue.Bind.name: self._send_queue_bind_ok,
-            commands.Basic.Qos.name: self._send_basic_qos_ok,
-            commands.Basic.Cancel.name: self._send_basic_cancel_ok,
-            commands.Basic.Publish.name: self._handle_publish,
-            commands.Basic.Consume.name: self._handle_consume,
-            commands.Basic.Ack.name: self._handle_ack,
-            commands.Basic.Nack.name: self._handle_nack,
-        }
-        if frame.name in handlers:
-            handler = handlers[frame.name]
-            return await handler(channel_id, frame)
-        return await self._do_nothing(channel_id, frame)
+        if isinstance(frame, base.Frame):
+            key = frame.index
+            if key == _BASIC_PUBLISH:
+                return await self._handle_publish(channel_id, cast(commands.Basic.Publish, frame))
+            if key == _BASIC_ACK:
+                return await self._handle_ack(channel_id, cast(commands.Basic.Ack, frame))
+        else:
+            key = _FRAME_KEYS[type(frame)]
+            if key == FRAME_BODY:
+                return await self._handle_content_body(channel_id, cast(ContentBody, frame))
+            if key == FRAME_HEADER:
+                return await self._handle_content_header(channel_id, cast(ContentHeader, frame))
+
+        handler = self._frame_handlers.get(key, AmqpConnection._do_nothing)
+        return await handler(self, channel_id, frame)
 
     async def _send_frame(self, channel_id: int, frame: AnyFrame) -> None:
-        _logger.debug(f"-> {frame.name}")
-        self._stream_writer.write(bytes(marshal(frame, channel_id)))
-        await self._stream_writer.drain()
+        _logger.debug("-> %s", frame.name)
+        if self._wire_tap is not None:
+            self._wire_tap.record("->", channel_id, frame)
+        self._write_buffer += marshal(frame, channel_id)
+        self._metrics.frames_sent += 1
+
+    async def _send_message(self, channel_id: int, frame_out: base.Frame,
+                            message: Message) -> None:
+        await self._send_frame(channel_id, frame_out)
+
+        body = message.body
+        properties = commands.Basic.Properties(**(message.properties or {}))
+        header = ContentHeader(body_size=len(body), properties=properties)
+        await self._send_frame(channel_id, header)
+        await self._send_body(channel_id, body)
+
+    async def _send_body(self, channel_id: int, body: bytes) -> None:
+        max_size = self._frame_max - _FRAME_OVERHEAD if self._frame_max else len(body)
+        if len(body) <= max_size:
+            await self._send_frame(channel_id, ContentBody(body))
+            return
+        for offset in range(0, len(body), max_size):
+            await self._send_frame(channel_id, ContentBody(body[offset:offset + max_size]))
+
+    async def _flush(self) -> None:
+        if not self._write_buffer:
+            return
+        data, self._write_buffer = self._write_buffer, bytearray()
+        if self._stream_writer.is_closing():
+            return
+
+        self._stream_writer.write(data)
+        self._metrics.bytes_sent += len(data)
+        if self._recorder:
+            self._recorder.record(OUTBOUND, data)
+        self._last_sent = get_running_loop().time()
+        if self._stream_writer.transport.get_write_buffer_size() > self._write_high_water:
+            await self._stream_writer.drain()
 
     async def _do_nothing(self, channel_id: int, frame_in: AnyFrame) -> None:
-        _logger.debug(f"-> DoNothing with {frame_in} on {channel_id}")
+        _logger.debug("-> DoNothing with %s on %s", frame_in, channel_id)
 
     async def _send_connection_start(self, channel_id: int, frame_in: base.Frame) -> None:
         frame_out = commands.Connection.Start(
@@ -206,13 +525,27 @@ class AmqpConnection:
 
     async def _send_connection_tune(self, channel_id: int,
                                     frame_in: commands.Connection.StartOk) -> None:
-        frame_out = commands.Connection.Tune(channel_max=0, frame_max=0, heartbeat=0)
+        capabilities = (frame_in.client_properties or {}).get("capabilities")
+        if isinstance(capabilities, dict):
+            self._client_capabilities = capabilities
+        frame_out = commands.Connection.Tune(channel_max=0, frame_max=self._frame_max,
+                                             heartbeat=self._heartbeat)
         return await self._send_frame(channel_id, frame_out)
 
+    async def _handle_connection_tune_ok(self, channel_id: int,
+                                         frame_in: commands.Connection.TuneOk) -> None:
+        if frame_in.frame_max and (not self._frame_max or frame_in.frame_max < self._frame_max):
+            self._frame_max = frame_in.frame_max
+
+        # The value sent back by the client is the negotiated one, 0 disables heartbeats
+        self._heartbeat = frame_in.heartbeat
+        if self._heartbeat > 0 and self._heartbeat_monitor is None:
+            self._heartbeat_monitor = create_task(self._heartbeat_task(self._heartbeat))
+
     async def _send_heartbeat(self, channel_id: int, frame_in: AnyFrame) -> None:
         frame_out = Heartbeat()
         await self._send_frame(channel_id, frame_out)
-        _logger.debug(f"-> Send heartbeat in response with {frame_in} on {channel_id}")
+        _logger.debug("-> Send heartbeat in response with %s on %s", frame_in, channel_id)
 
     async def _send_connection_open_ok(self, channel_id: int,
                                        frame_in: commands.Connection.Open) -> None:
@@ -221,13 +554,14 @@ class AmqpConnection:
 
     async def _send_channel_open_ok(self, channel_id: int,
                                     frame_in: commands.Channel.Open) -> None:
+        self._channels[channel_id] = AmqpChannel(channel_id)
         frame_out = commands.Channel.OpenOk()
         await self._send_frame(channel_id, frame_out)
 
     async def _send_queue_declare_ok(self, channel_id: int,
                                      frame_in: commands.Queue.Declare) -> None:
         if self._on_declare_queue:
-            await self._on_declare_queue(frame_in.queue)
+            await self._on_declare_queue(frame_in.queue, dict(frame_in.arguments or {}))
 
         frame_out = commands.Queue.DeclareOk(queue=frame_in.queue,
                                              message_count=0, consumer_count=0)
@@ -242,31 +576,91 @@ class AmqpConnection:
 
     async def _send_queue_bind_ok(self, channel_id: int, frame_in: commands.Queue.Bind) -> None:
         if self._on_bind:
-            await self._on_bind(frame_in.queue, frame_in.exchange, frame_in.routing_key)
+            await self._on_bind(frame_in.queue, frame_in.exchange, frame_in.routing_key,
+                                dict(frame_in.arguments or {}))
 
         frame_out = commands.Queue.BindOk()
         return await self._send_frame(channel_id, frame_out)
 
+    async def _send_exchange_bind_ok(self, channel_id: int,
+                                     frame_in: commands.Exchange.Bind) -> None:
+        if self._on_bind_exchange:
+            await self._on_bind_exchange(frame_in.destination, frame_in.source,
+                                         frame_in.routing_key, dict(frame_in.arguments or {}))
+        if frame_in.nowait:
+            return
+        frame_out = commands.Exchange.BindOk()
+        return await self._send_frame(channel_id, frame_out)
+
     async def _send_confirm_select_ok(self, channel_id: int,
                                       frame_in: commands.Confirm.Select) -> None:
+        self._get_channel(channel_id).select_confirm()
+        if frame_in.nowait:
+            return
         frame_out = commands.Confirm.SelectOk()
         return await self._send_frame(channel_id, frame_out)
 
+    async def _send_tx_select_ok(self, channel_id: int, frame_in: commands.Tx.Select) -> None:
+        self._get_channel(channel_id).select_tx()
+        frame_out = commands.Tx.SelectOk()
+        return await self._send_frame(channel_id, frame_out)
+
+    async def _send_tx_commit_ok(self, channel_id: int, frame_in: commands.Tx.Commit) -> None:
+        channel = self._get_channel(channel_id)
+        if not channel.tx_mode:
+            return await self._send_channel_error(
+                channel_id, frame_in, PRECONDITION_FAILED,
+                "PRECONDITION_FAILED - channel is not transactional")
+        messages, acked, nacked = channel.pop_tx()
+        self._metrics.acked += len(acked)
+        self._metrics.nacked += len(nacked)
+        if self._on_commit:
+            await self._on_commit(messages, acked, nacked)
+        frame_out = commands.Tx.CommitOk()
+        return await self._send_frame(channel_id, frame_out)
+
+    async def _send_tx_rollback_ok(self, channel_id: int,
+                                   frame_in: commands.Tx.Rollback) -> None:
+        channel = self._get_channel(channel_id)
+        if not channel.tx_mode:
+            return await self._send_channel_error(
+                channel_id, frame_in, PRECONDITION_FAILED,
+                "PRECONDITION_FAILED - channel is not transactional")
+        channel.rollback_tx()
+        frame_out = commands.Tx.RollbackOk()
+        return await self._send_frame(channel_id, frame_out)
+
     async def _send_connection_close_ok(self, channel_id: int,
                                         frame_in: commands.Connection.Close) -> None:
+        await self._close_channels()
+
         frame_out = commands.Connection.CloseOk()
         await self._send_frame(channel_id, frame_out)
+        await self._flush()
 
         self._stream_writer.close()
         await self._stream_writer.wait_closed()
 
+    async def _send_channel_error(self, channel_id: int, frame_in: base.Frame,
+                                  reply_code: int, reply_text: str) -> None:
+        # Channel exceptions close the channel, the client answers with CloseOk
+        await self._close_channel(channel_id)
+        class_id, method_id = divmod(frame_in.index, 0x10000)
+        frame_out = commands.Channel.Close(reply_code=reply_code,
+                                           reply_text=reply_text,
+                                           class_id=class_id, method_id=method_id)
+        await self._send_frame(channel_id, frame_out)
+
     async def _send_channel_close_ok(self, channel_id: int,
                                      frame_in: commands.Channel.Close) -> None:
+        await self._close_channel(channel_id)
+
         frame_out = commands.Channel.CloseOk()
         await self._send_frame(channel_id, frame_out)
 
     async def _send_basic_qos_ok(self, channel_id: int,
                                  frame_in: commands.Basic.Qos) -> None:
+        self._get_channel(channel_id).set_qos(frame_in.prefetch_count, frame_in.global_)
         frame_out = commands.Basic.QosOk()
         return await self._send_frame(channel_id, frame_out)
 
@@ -282,41 +676,120 @@ class AmqpConnection:
         return await self._send_frame(channel_id, frame_out)
 
     async def _handle_publish(self, channel_id: int, frame_in: commands.Basic.Publish) -> None:
-        self._incoming_message = Message(None,
-                                         exchange=frame_in.exchange,
-                                         routing_key=frame_in.routing_key)
+        self._get_channel(channel_id).start_publish(frame_in.exchange, frame_in.routing_key)
         return await self._do_nothing(channel_id, frame_in)
 
     async def _handle_content_header(self, channel_id: int, frame_in: ContentHeader) -> None:
-        if self._incoming_message:
-            self._incoming_message.properties = dict(frame_in.properties)
+        channel = self._get_channel(channel_id)
+        message = channel.add_content_header(frame_in.body_size, dict(frame_in.properties))
+        if message:
+            return await self._handle_incoming_message(channel, message)
         return await self._do_nothing(channel_id, frame_in)
 
     async def _handle_content_body(self, channel_id: int, frame_in: ContentBody) -> None:
-        if self._incoming_message:
-            self._incoming_message.value = frame_in.value
-            if self._on_publish:
-                await self._on_publish(self._incoming_message)
-            self._incoming_message = None
-
-        frame_out = commands.Basic.Ack(delivery_tag=self._get_delivery_tag(), multiple=False)
-        await self._send_frame(channel_id, frame_out)
+        channel = self._get_channel(channel_id)
+        message = channel.add_content_body(frame_in.value)
+        if message:
+            return await self._handle_incoming_message(channel, message)
+
+    async def _handle_incoming_message(self, channel: AmqpChannel, message: Message) -> None:
+        self._metrics.published += 1
+        if channel.tx_mode:
+            channel.add_tx_publish(message)
+        elif self._on_publish:
+            await self._on_publish(message)
+        if not self._publisher:
+            self._publisher = True
+            await self._apply_flow_control()
+
+        if channel.confirm_mode:
+            channel.next_publish_seq()
+            self._unconfirmed_channels.add(channel.channel_id)
 
     async def _handle_consume(self, channel_id: int, frame_in: commands.Basic.Consume) -> None:
         consumer_tag = frame_in.consumer_tag
         frame_out = commands.Basic.ConsumeOk(consumer_tag=consumer_tag)
         await self._send_frame(channel_id, frame_out)
 
-        consumer = create_task(
-            self._consumer_task(frame_in.queue, consumer_tag, channel_id))
-        self._consumers[channel_id, consumer_tag] = consumer
+        channel = self._get_channel(channel_id)
+        consumer = channel.add_consumer(consumer_tag, no_ack=frame_in.no_ack)
+        self._consumers[channel_id, consumer_tag] = create_task(
+            self._consumer_task(frame_in.queue, consumer, channel))
+
+    async def _handle_get(self, channel_id: int, frame_in: commands.Basic.Get) -> None:
+        result = await self._on_get(frame_in.queue) if self._on_get else None
+        if result is None:
+            return await self._send_frame(channel_id, commands.Basic.GetEmpty())
+
+        message, message_count = result
+        self._metrics.delivered += 1
+        channel = self._get_channel(channel_id)
+        delivery_tag = channel.next_delivery_tag()
+        channel.track_delivery(delivery_tag, message.id, channel.get_consumer(frame_in.no_ack))
+
+        frame_out = commands.Basic.GetOk(
+            delivery_tag=delivery_tag,
+            exchange=message.exchange,
+            routing_key=message.routing_key,
+            message_count=message_count,
+        )
+        await self._send_message(channel_id, frame_out, message)
+
+    async def _settle(self, channel_id: int, delivery_tag: int, multiple: bool,
+                      acked: bool) -> None:
+        channel = self._get_channel(channel_id)
+        if channel.tx_mode:
+            return channel.add_tx_settle(delivery_tag, multiple, acked)
+        message_ids = channel.release_deliveries(delivery_tag, multiple)
+        if acked:
+            self._metrics.acked += len(message_ids)
+        else:
+            self._metrics.nacked += len(message_ids)
+
+        callback = self._on_ack if acked else self._on_nack
+        if callback:
+            for message_id in message_ids:
+                await callback(message_id)
 
     async def _handle_ack(self, channel_id: int, frame_in: commands.Basic.Ack) -> None:
-        if self._on_ack:
-            message_id = self._delivered_messages[frame_in.delivery_tag]
-            await self._on_ack(message_id)
+        await self._settle(channel_id, frame_in.delivery_tag, frame_in.multiple, acked=True)
 
     async def _handle_nack(self, channel_id: int, frame_in: commands.Basic.Nack) -> None:
-        if self._on_nack:
-            message_id = self._delivered_messages[frame_in.delivery_tag]
-            await self._on_nack(message_id)
+        await self._settle(channel_id, frame_in.delivery_tag, frame_in.multiple, acked=False)
+
+    async def _handle_reject(self, channel_id: int, frame_in: commands.Basic.Reject) -> None:
+        await self._settle(channel_id, frame_in.delivery_tag or 0, False, acked=False)
+
+    def __repr__(self) -> str:
+        cls_name = self.__class__.__name__
+        peername = self._stream_writer.get_extra_info("peername")
+        return f"<{cls_name} peername={peername!r}>"
+
+    _frame_handlers: ClassVar[Dict[int, Callable[..., Awaitable[Any]]]] = {
+        FRAME_HEARTBEAT: _send_heartbeat,
+        _PROTOCOL_HEADER: _send_connection_start,
+        FRAME_HEADER: _handle_content_header,
+        FRAME_BODY: _handle_content_body,
+        commands.Connection.StartOk.index: _send_connection_tune,
+        commands.Connection.TuneOk.index: _handle_connection_tune_ok,
+        commands.Connection.Open.index: _send_connection_open_ok,
+        commands.Connection.Close.index: _send_connection_close_ok,
+        commands.Channel.Open.index: _send_channel_open_ok,
+        commands.Channel.Close.index: _send_channel_close_ok,
+        commands.Confirm.Select.index: _send_confirm_select_ok,
+        commands.Tx.Select.index: _send_tx_select_ok,
+        commands.Tx.Commit.index: _send_tx_commit_ok,
+        commands.Tx.Rollback.index: _send_tx_rollback_ok,
+        commands.Queue.Declare.index: _send_queue_declare_ok,
+        commands.Exchange.Declare.index: _send_exchange_declare_ok,
+        commands.Queue.Bind.index: _send_queue_bind_ok,
+        commands.Exchange.Bind.index: _send_exchange_bind_ok,
+        commands.Basic.Qos.index: _send_basic_qos_ok,
+        commands.Basic.Cancel.index: _send_basic_cancel_ok,
+        commands.Basic.Publish.index: _handle_publish,
+        commands.Basic.Consume.index: _handle_consume,
+        commands.Basic.Get.index: _handle_get,
+        commands.Basic.Ack.index: _handle_ack,
+        commands.Basic.Nack.index: _handle_nack,
+        commands.Basic.Reject.index: _handle_reject,
+    }
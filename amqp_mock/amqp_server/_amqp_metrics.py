@@ -0,0 +1,110 @@
+from bisect import bisect_left
+from typing import Any, Dict, List, Tuple
+
+__all__ = ("AmqpMetrics", "LatencyHistogram", "LATENCY_BUCKETS",)
+
+# Upper bounds (seconds) of the handler latency buckets
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+)
+
+_COUNTERS = (
+    "frames_received", "frames_sent", "bytes_received", "bytes_sent",
+    "published", "delivered", "acked", "nacked",
+)
+
+
+class LatencyHistogram:
+    __slots__ = ("counts", "count", "sum",)
+
+    def __init__(self) -> None:
+        # The last bucket is +Inf
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def merge(self, other: 'LatencyHistogram') -> None:
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.count += other.count
+        self.sum += other.sum
+
+    def get_buckets(self) -> List[Tuple[str, int]]:
+        # Cumulative, as in Prometheus
+        buckets, total = [], 0
+        for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), self.counts):
+            total += count
+            buckets.append(("+Inf" if bound == float("inf") else repr(bound), total))
+        return buckets
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": dict(self.get_buckets()),
+        }
+
+    def __repr__(self) -> str:
+        cls_name = self.__class__.__name__
+        return f"<{cls_name} count={self.count!r} sum={self.sum!r}>"
+
+
+class AmqpMetrics:
+    __slots__ = _COUNTERS + ("methods",)
+
+    def __init__(self) -> None:
+        self.frames_received = 0
+        self.frames_sent = 0
+        self.bytes_received = 0
+        self.bytes_sent = 0
+        self.published = 0
+        self.delivered = 0
+        self.acked = 0
+        self.nacked = 0
+        self.methods: Dict[str, LatencyHistogram] = {}
+
+    def observe(self, method: str, seconds: float) -> None:
+        histogram = self.methods.get(method)
+        if histogram is None:
+            histogram = self.methods[method] = LatencyHistogram()
+        histogram.observe(seconds)
+
+    def merge(self, other: 'AmqpMetrics') -> None:
+        for name in _COUNTERS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        for method, histogram in other.methods.items():
+            if method not in self.methods:
+                self.methods[method] = LatencyHistogram()
+            self.methods[method].merge(histogram)
+
+    def to_dict(self) -> Dict[str, Any]:
+        metrics: Dict[str, Any] = {name: getattr(self, name) for name in _COUNTERS}
+        metrics["methods"] = {
+            method: histogram.to_dict() for method, histogram in sorted(self.methods.items())
+        }
+        return metrics
+
+    def to_prometheus(self, prefix: str = "amqp_mock") -> List[str]:
+        lines = []
+        for name in _COUNTERS:
+            lines += [f"# TYPE {prefix}_{name}_total counter",
+                      f"{prefix}_{name}_total {getattr(self, name)}"]
+
+        metric = f"{prefix}_method_latency_seconds"
+        lines += [f"# TYPE {metric} histogram"]
+        for method, histogram in sorted(self.methods.items()):
+            for bound, count in histogram.get_buckets():
+                lines += [f'{metric}_bucket{{method="{method}",le="{bound}"}} {count}']
+            lines += [f'{metric}_sum{{method="{method}"}} {histogram.sum}',
+                      f'{metric}_count{{method="{method}"}} {histogram.count}']
+        return lines
+
+    def __repr__(self) -> str:
+        cls_name = self.__class__.__name__
+        return (f"<{cls_name} frames_received={self.frames_received!r} "
+                f"frames_sent={self.frames_sent!r}>")
@@ -0,0 +1,50 @@
+import struct
+from time import monotonic
+from typing import BinaryIO, Iterator, Tuple
+
+__all__ = ("AmqpRecorder", "read_recording", "INBOUND", "OUTBOUND",)
+
+INBOUND = 0
+OUTBOUND = 1
+
+_MAGIC = b"AMQPMOCK\x01"
+# direction, seconds since the start of the session, data size
+_RECORD_HEADER = struct.Struct(">BdI")
+
+
+class AmqpRecorder:
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._file: BinaryIO = open(path, "wb")
+        self._file.write(_MAGIC)
+        self._started_at = monotonic()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def record(self, direction: int, data: bytes) -> None:
+        if self._file.closed:
+            return
+        header = _RECORD_HEADER.pack(direction, monotonic() - self._started_at, len(data))
+        self._file.write(header)
+        self._file.write(data)
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __repr__(self) -> str:
+        cls_name = self.__class__.__name__
+        return f"<{cls_name} path={self._path!r}>"
+
+
+def read_recording(path: str) -> Iterator[Tuple[int, float, bytes]]:
+    with open(path, "rb") as file:
+        if file.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError(f"{path!r} is not an amqp-mock recording")
+        while True:
+            header = file.read(_RECORD_HEADER.size)
+            if len(header) < _RECORD_HEADER.size:
+                return
+            direction, timestamp, size = _RECORD_HEADER.unpack(header)
+            yield direction, timestamp, file.read(size)
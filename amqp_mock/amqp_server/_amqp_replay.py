@@ -0,0 +1,100 @@
+import struct
+from asyncio import Event, TimeoutError, create_task, get_running_loop, open_connection, wait_for
+from asyncio.streams import StreamReader
+
+from pamqp.constants import FRAME_HEADER_SIZE, FRAME_HEARTBEAT
+
+from ._amqp_recorder import INBOUND, OUTBOUND, read_recording
+
+__all__ = ("ReplayResult", "replay_recording",)
+
+_READ_CHUNK_SIZE = 2 ** 16
+_FRAME_HEADER = struct.Struct(">BHI")
+
+
+class ReplayResult:
+    __slots__ = ("bytes_sent", "bytes_received", "elapsed",)
+
+    def __init__(self, bytes_sent: int, bytes_received: int, elapsed: float) -> None:
+        self.bytes_sent = bytes_sent
+        self.bytes_received = bytes_received
+        self.elapsed = elapsed
+
+    def __repr__(self) -> str:
+        cls_name = self.__class__.__name__
+        return (f"<{cls_name} bytes_sent={self.bytes_sent!r} "
+                f"bytes_received={self.bytes_received!r} elapsed={self.elapsed!r}>")
+
+
+class _Progress:
+    def __init__(self, reader: StreamReader) -> None:
+        self.received = 0
+        self._changed = Event()
+        self._task = create_task(self._read(reader))
+
+    async def _read(self, reader: StreamReader) -> None:
+        while True:
+            chunk = await reader.read(_READ_CHUNK_SIZE)
+            self.received += len(chunk)
+            self._changed.set()
+            if not chunk:
+                return
+
+    async def wait_for(self, expected: int, timeout: float) -> None:
+        while self.received < expected and not self._task.done():
+            self._changed.clear()
+            try:
+                await wait_for(self._changed.wait(), timeout)
+            except TimeoutError:
+                # The server answered differently than in the recording, don't wait for it
+                return
+
+    def cancel(self) -> None:
+        self._task.cancel()
+
+
+def _get_expected_size(data: bytes) -> int:
+    # Server heartbeats depend on timing, not on the client, they are not waited for.
+    # Outbound records are whole flushes, so they consist of whole frames
+    size, offset = len(data), 0
+    while len(data) - offset >= FRAME_HEADER_SIZE:
+        frame_type, _, frame_size = _FRAME_HEADER.unpack_from(data, offset)
+        frame_end = offset + FRAME_HEADER_SIZE + frame_size + 1
+        if frame_type == FRAME_HEARTBEAT:
+            size -= frame_end - offset
+        offset = frame_end
+    return size
+
+
+async def replay_recording(path: str, host: str = "localhost", port: int = 5672, *,
+                           timeout: float = 1.0) -> ReplayResult:
+    # Client data is sent as fast as the server answers: every inbound chunk goes out
+    # as soon as the server has sent what it had sent at that point of the recorded session
+    records = [(direction, data) for direction, _, data in read_recording(path)]
+
+    loop = get_running_loop()
+    started_at = loop.time()
+    reader, writer = await open_connection(host, port)
+    progress = _Progress(reader)
+
+    sent, expected = 0, 0
+    for direction, data in records:
+        if direction == OUTBOUND:
+            expected += _get_expected_size(data)
+        elif direction == INBOUND:
+            await progress.wait_for(expected, timeout)
+            # What the server didn't send by now is not coming, don't wait for it again
+            expected = min(expected, progress.received)
+            writer.write(data)
+            sent += len(data)
+    await writer.drain()
+    await progress.wait_for(expected, timeout)
+    elapsed = loop.time() - started_at
+
+    progress.cancel()
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except ConnectionError:
+        pass
+    return ReplayResult(sent, progress.received, elapsed)
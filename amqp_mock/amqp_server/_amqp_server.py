@@ -1,17 +1,27 @@
-import json
+import os
+from asyncio import create_task
 from asyncio.streams import StreamReader, StreamWriter
-from typing import Any, AsyncGenerator, Dict, List, Optional
+from itertools import groupby
+from operator import attrgetter
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
 
 from .._message import Message, MessageStatus
 from .._storage import Storage
-from ._amqp_connection import AmqpConnection
+from ._amqp_connection import FRAME_MAX, HEARTBEAT, WRITE_HIGH_WATER, AmqpConnection
+from ._amqp_metrics import AmqpMetrics
+from ._amqp_recorder import AmqpRecorder
 
 __all__ = ("AmqpServer",)
 
 
 class AmqpServer:
     def __init__(self, storage: Storage, host: str = "0.0.0.0", port: Optional[int] = None,
-                 server_properties: Optional[Dict[str, Any]] = None) -> None:
+                 server_properties: Optional[Dict[str, Any]] = None, *,
+                 write_high_water: int = WRITE_HIGH_WATER,
+                 frame_max: int = FRAME_MAX,
+                 heartbeat: int = HEARTBEAT,
+                 wire_tap: int = 0,
+                 record_dir: Optional[str] = None) -> None:
         self._storage = storage
         self._host = host
         self._port = port
@@ -34,7 +44,18 @@ class AmqpServer:
             "product": "<product>",
             "version": "<version>",
         }
+        self._write_high_water = write_high_water
+        self._frame_max = frame_max
+        self._heartbeat = heartbeat
+        self._wire_tap = wire_tap
+        # Every connection is recorded to its own file, see replay_recording()
+        self._record_dir = record_dir
+        self._recorded_sessions = 0
+        self._reaped_connections = 0
         self._connections: List[AmqpConnection] = []
+        # Metrics of closed connections
+        self._closed_metrics = AmqpMetrics()
+        self._storage.on_blocked(self._on_blocked)
 
     @property
     def host(self) -> str:
@@ -48,53 +69,125 @@ class AmqpServer:
     def port(self, value: int) -> None:
         self._port = value
 
-    async def _on_bind(self, queue: str, exchange: str, routing_key: str) -> None:
-        await self._storage.bind_queue_to_exchange(queue, exchange, routing_key)
+    @property
+    def connections(self) -> List[AmqpConnection]:
+        return list(self._connections)
+
+    @property
+    def reaped_connections(self) -> int:
+        return self._reaped_connections
+
+    @property
+    def metrics(self) -> AmqpMetrics:
+        metrics = AmqpMetrics()
+        metrics.merge(self._closed_metrics)
+        for connection in self._connections:
+            metrics.merge(connection.metrics)
+        return metrics
+
+    @property
+    def wire_tap(self) -> int:
+        return self._wire_tap
+
+    def set_wire_tap(self, size: int) -> None:
+        # Applies to the open connections too, zero size turns the wire tap off
+        self._wire_tap = size
+        for connection in self._connections:
+            connection.set_wire_tap(size)
+
+    async def _on_bind(self, queue: str, exchange: str, routing_key: str,
+                       arguments: Dict[str, Any]) -> None:
+        await self._storage.bind_queue_to_exchange(queue, exchange, routing_key, arguments)
+
+    async def _on_bind_exchange(self, destination: str, source: str, routing_key: str,
+                                arguments: Dict[str, Any]) -> None:
+        await self._storage.bind_exchange_to_exchange(destination, source, routing_key,
+                                                      arguments)
 
     async def _on_declare_exchange(self, exchange: str, exchange_type: str) -> None:
         await self._storage.declare_exchange(exchange, exchange_type)
 
-    async def _on_declare_queue(self, queue: str) -> None:
-        await self._storage.declare_queue(queue)
+    async def _on_declare_queue(self, queue: str, arguments: Dict[str, Any]) -> None:
+        await self._storage.declare_queue(queue, arguments)
 
     async def _on_publish(self, message: Message) -> None:
-        try:
-            message.value = json.loads(message.value.decode())
-        except (TypeError, ValueError):
-            message.value = str(message.value)
         await self._storage.add_message_to_exchange(message.exchange, message)
 
+    async def _on_commit(self, messages: List[Message],
+                         acked: List[str], nacked: List[str]) -> None:
+        # Only consecutive publishes are batched, so that the publish order is kept
+        for exchange, exchange_messages in groupby(messages, key=attrgetter("exchange")):
+            await self._storage.add_messages_to_exchange(exchange, list(exchange_messages))
+
+        if acked:
+            await self._storage.change_messages_status(acked, MessageStatus.ACKED)
+        if nacked:
+            await self._storage.change_messages_status(nacked, MessageStatus.NACKED)
+
     async def _on_consume(self, queue_name: str) -> AsyncGenerator[Message, None]:
         async for message in self._storage.get_next_message(queue_name):
             await self._storage.change_message_status(message.id, MessageStatus.CONSUMING)
             yield message
 
+    async def _on_get(self, queue_name: str) -> Optional[Tuple[Message, int]]:
+        message = await self._storage.get_message_nowait(queue_name)
+        if message is None:
+            return None
+        await self._storage.change_message_status(message.id, MessageStatus.CONSUMING)
+        return message, await self._storage.get_queue_size(queue_name)
+
     async def _on_ack(self, message_id: str) -> None:
         await self._storage.change_message_status(message_id, MessageStatus.ACKED)
 
     async def _on_nack(self, message_id: str) -> None:
         await self._storage.change_message_status(message_id, MessageStatus.NACKED)
 
+    async def _on_blocked(self, blocked: bool) -> None:
+        for connection in list(self._connections):
+            await connection.set_blocked(blocked)
+
     async def _on_close(self, connection: AmqpConnection) -> None:
-        self._connections.remove(connection)
+        if connection in self._connections:
+            self._connections.remove(connection)
+            self._closed_metrics.merge(connection.metrics)
+        if connection.reaped:
+            self._reaped_connections += 1
+
+    def _create_recorder(self) -> Optional[AmqpRecorder]:
+        if self._record_dir is None:
+            return None
+        self._recorded_sessions += 1
+        filename = f"session-{self._recorded_sessions:04d}.amqprec"
+        return AmqpRecorder(os.path.join(self._record_dir, filename))
 
     def __call__(self, reader: StreamReader, writer: StreamWriter) -> AmqpConnection:
-        connection = AmqpConnection(reader, writer, self._on_consume, self._server_properties)
+        connection = AmqpConnection(reader, writer, self._on_consume, self._server_properties,
+                                    write_high_water=self._write_high_water,
+                                    frame_max=self._frame_max,
+                                    heartbeat=self._heartbeat,
+                                    recorder=self._create_recorder())
         connection.on_publish(self._on_publish) \
                   .on_bind(self._on_bind) \
+                  .on_bind_exchange(self._on_bind_exchange) \
                   .on_declare_exchange(self._on_declare_exchange) \
                   .on_declare_queue(self._on_declare_queue) \
                   .on_ack(self._on_ack) \
                   .on_nack(self._on_nack) \
+                  .on_get(self._on_get) \
+                  .on_commit(self._on_commit) \
                   .on_close(self._on_close)
+        if self._wire_tap:
+            connection.set_wire_tap(self._wire_tap)
         self._connections += [connection]
+        if self._storage.blocked:
+            create_task(connection.set_blocked(True))
         return connection
 
     def pre_shutdown(self) -> None:
         pass
 
     async def shutdown(self, timeout: Optional[float] = None) -> None:
-        for connection in self._connections:
+        for connection in list(self._connections):
             await connection.close()
 
     def __repr__(self) -> str:
@@ -0,0 +1,51 @@
+from collections import deque
+from time import time
+from typing import Any, Deque, Dict, List, Tuple
+
+from pamqp import base
+from pamqp.body import ContentBody
+from pamqp.header import ContentHeader
+
+__all__ = ("WireTap",)
+
+_Record = Tuple[float, str, int, Any]
+
+
+class WireTap:
+    def __init__(self, size: int) -> None:
+        # Frames are kept as is and only formatted when someone asks for them
+        self._records: Deque[_Record] = deque(maxlen=size)
+
+    @property
+    def size(self) -> int:
+        return self._records.maxlen or 0
+
+    def record(self, direction: str, channel_id: int, frame: Any) -> None:
+        self._records.append((time(), direction, channel_id, frame))
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return [{
+            "time": timestamp,
+            "direction": direction,
+            "channel": channel_id,
+            "frame": frame.name,
+            "arguments": self._get_arguments(frame),
+        } for timestamp, direction, channel_id, frame in self._records]
+
+    def _get_arguments(self, frame: Any) -> Dict[str, Any]:
+        if isinstance(frame, ContentBody):
+            return {"size": len(frame.value)}
+        if isinstance(frame, ContentHeader):
+            return {"body_size": frame.body_size}
+        if isinstance(frame, base.Frame):
+            return {key: self._to_primitive(value) for key, value in frame}
+        return {}
+
+    def _to_primitive(self, value: Any) -> Any:
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        return str(value)
+
+    def __repr__(self) -> str:
+        cls_name = self.__class__.__name__
+        return f"<{cls_name} size={self.size!r} records={len(self._records)!r}>"
@@ -1,8 +1,11 @@
+from typing import Any, Dict, Optional
+
 from aiohttp import web
 from aiohttp.web import json_response
 
 from .._message import Message
 from .._storage import Storage
+from ..amqp_server import AmqpMetrics, AmqpServer
 from ._http_route import route
 
 __all__ = ("HttpServer",)
@@ -13,6 +16,7 @@ class HttpServer:
         self._storage = storage
         self._host = host
         self._port = port
+        self._amqp_server: Optional[AmqpServer] = None
 
     @property
     def host(self) -> str:
@@ -26,6 +30,14 @@ class HttpServer:
     def port(self, port: int) -> None:
         self._port = port
 
+    @property
+    def amqp_server(self) -> Optional[AmqpServer]:
+        return self._amqp_server
+
+    @amqp_server.setter
+    def amqp_server(self, amqp_server: AmqpServer) -> None:
+        self._amqp_server = amqp_server
+
     @route("GET", "/healthcheck")
     async def healthcheck(self, request: web.Request) -> web.Response:
         return json_response("200 OK")
@@ -57,8 +69,57 @@ class HttpServer:
     @route("GET", "/queues/{queue:.*}/messages/history")
     async def get_consumed_messages(self, request: web.Request) -> web.Response:
         queue = request.match_info["queue"]
-        messages = await self._storage.get_history()
-        return json_response([msg.to_dict() for msg in messages if msg.queue == queue])
+        messages = await self._storage.get_queue_history(queue)
+        return json_response([msg.to_dict() for msg in messages])
+
+    @route("GET", "/metrics")
+    async def get_metrics(self, request: web.Request) -> web.Response:
+        amqp_server = self._amqp_server
+        metrics = amqp_server.metrics if amqp_server else AmqpMetrics()
+        connections = amqp_server.connections if amqp_server else []
+        reaped_connections = amqp_server.reaped_connections if amqp_server else 0
+        evictions = self._storage.evictions
+
+        if request.query.get("format") == "prometheus":
+            lines = ["# TYPE amqp_mock_connections gauge",
+                     f"amqp_mock_connections {len(connections)}",
+                     "# TYPE amqp_mock_reaped_connections_total counter",
+                     f"amqp_mock_reaped_connections_total {reaped_connections}"]
+            lines += metrics.to_prometheus()
+            lines.append("# TYPE amqp_mock_evicted_messages_total counter")
+            lines += [f'amqp_mock_evicted_messages_total{{reason="{reason}"}} {count}'
+                      for reason, count in sorted(evictions.items())]
+            return web.Response(text="\n".join(lines) + "\n")
+
+        payload: Dict[str, Any] = {
+            "connections": len(connections),
+            "reaped_connections": reaped_connections,
+            **metrics.to_dict(),
+            "evictions": evictions,
+            "per_connection": [
+                {"peername": x.peername, **x.metrics.to_dict()} for x in connections
+            ],
+        }
+        return json_response(payload)
+
+    @route("GET", "/wiretap")
+    async def get_wire_tap(self, request: web.Request) -> web.Response:
+        amqp_server = self._amqp_server
+        connections = amqp_server.connections if amqp_server else []
+        return json_response({
+            "size": amqp_server.wire_tap if amqp_server else 0,
+            "connections": [
+                {"peername": x.peername, "frames": x.wire_tap.to_list() if x.wire_tap else []}
+                for x in connections
+            ],
+        })
+
+    @route("PUT", "/wiretap")
+    async def set_wire_tap(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        if self._amqp_server:
+            self._amqp_server.set_wire_tap(int(payload["size"]))
+        return json_response()
 
     def __repr__(self) -> str:
         cls_name = self.__class__.__name__
@@ -0,0 +1,97 @@
+import asyncio
+import time
+from asyncio import StreamReader
+from typing import Any, Callable, Dict, List
+
+from pamqp import commands
+from pamqp.body import ContentBody
+from pamqp.header import ContentHeader, ProtocolHeader
+from pamqp.heartbeat import Heartbeat
+
+from amqp_mock.amqp_server import AmqpConnection
+
+ITERATIONS = 200_000
+
+
+class NullWriter:
+    def write(self, data: bytes) -> None:
+        pass
+
+    def is_closing(self) -> bool:
+        return False
+
+    def close(self) -> None:
+        pass
+
+    async def wait_closed(self) -> None:
+        pass
+
+
+async def legacy_dispatch_frame(self: AmqpConnection, frame: Any, channel_id: int) -> Any:
+    # Dispatch as it was done before the class-level table: a dict of bound
+    # methods keyed by frame name is rebuilt for every frame
+    handlers: Dict[str, Callable[[int, Any], Any]] = {
+        Heartbeat.name: self._send_heartbeat,
+        ProtocolHeader.name: self._send_connection_start,
+        ContentHeader.name: self._handle_content_header,
+        ContentBody.name: self._handle_content_body,
+        commands.Connection.StartOk.name: self._send_connection_tune,
+        commands.Connection.TuneOk.name: self._do_nothing,
+        commands.Connection.Open.name: self._send_connection_open_ok,
+        commands.Connection.Close.name: self._send_connection_close_ok,
+        commands.Channel.Open.name: self._send_channel_open_ok,
+        commands.Channel.Close.name: self._send_channel_close_ok,
+        commands.Confirm.Select.name: self._send_confirm_select_ok,
+        commands.Queue.Declare.name: self._send_queue_declare_ok,
+        commands.Exchange.Declare.name: self._send_exchange_declare_ok,
+        commands.Queue.Bind.name: self._send_queue_bind_ok,
+        commands.Basic.Qos.name: self._send_basic_qos_ok,
+        commands.Basic.Cancel.name: self._send_basic_cancel_ok,
+        commands.Basic.Publish.name: self._handle_publish,
+        commands.Basic.Consume.name: self._handle_consume,
+        commands.Basic.Ack.name: self._handle_ack,
+        commands.Basic.Nack.name: self._handle_nack,
+    }
+    if frame.name in handlers:
+        handler = handlers[frame.name]
+        return await handler(channel_id, frame)
+    return await self._do_nothing(channel_id, frame)
+
+
+async def noop(*args: Any) -> None:
+    pass
+
+
+async def measure(dispatch: Callable[..., Any], connection: AmqpConnection,
+                  frames: List[Any]) -> float:
+    started_at = time.perf_counter()
+    for _ in range(ITERATIONS):
+        for frame in frames:
+            await dispatch(connection, frame, 1)
+        connection._write_buffer.clear()
+    elapsed = time.perf_counter() - started_at
+    return elapsed / (ITERATIONS * len(frames)) * 10 ** 9
+
+
+async def main() -> None:
+    connection = AmqpConnection(StreamReader(), NullWriter(), noop, {})  # type: ignore
+    connection.on_publish(noop)
+
+    scenarios = {
+        "publish": [
+            commands.Basic.Publish(exchange="exchange", routing_key="routing_key"),
+            ContentHeader(body_size=2),
+            ContentBody(b"{}"),
+        ],
+        "tune_ok": [commands.Connection.TuneOk()],
+    }
+    for name, frames in scenarios.items():
+        before = await measure(legacy_dispatch_frame, connection, frames)
+        after = await measure(AmqpConnection.dispatch_frame, connection, frames)
+        print(f"{name:<10} before {before:8.1f} ns/frame  after {after:8.1f} ns/frame")
+
+    await connection.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,28 @@
+import asyncio
+import time
+
+from amqp_mock import Message, Storage
+
+MESSAGES = 1_000_000
+EXCHANGE = "benchmark_exchange"
+
+
+async def main() -> None:
+    storage = Storage()
+    messages = [Message(index, exchange=EXCHANGE) for index in range(MESSAGES)]
+
+    started_at = time.perf_counter()
+    for message in messages:
+        await storage.add_message_to_exchange(EXCHANGE, message)
+    elapsed = time.perf_counter() - started_at
+    print(f"{'publish':<14} {MESSAGES / elapsed:10.0f} msg/s")
+
+    started_at = time.perf_counter()
+    published = await storage.get_messages_from_exchange(EXCHANGE)
+    elapsed = time.perf_counter() - started_at
+    assert published[0] is messages[-1]
+    print(f"{'read log':<14} {elapsed * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
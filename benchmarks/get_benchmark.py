@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+import aiormq
+
+from amqp_mock import AmqpServer, HttpServer, Message, Storage, create_amqp_mock
+
+MESSAGES = 10_000
+QUEUE = "benchmark_queue"
+
+
+async def fill_queue(storage: Storage) -> None:
+    for index in range(MESSAGES):
+        await storage.add_message_to_queue(QUEUE, Message(index))
+
+
+async def run_basic_get(channel: aiormq.Channel) -> None:
+    for _ in range(MESSAGES):
+        await channel.basic_get(QUEUE, no_ack=True)
+
+
+async def run_basic_consume(channel: aiormq.Channel) -> None:
+    received = 0
+    done = asyncio.get_running_loop().create_future()
+
+    async def on_message(message: aiormq.abc.DeliveredMessage) -> None:
+        nonlocal received
+        received += 1
+        if received == MESSAGES:
+            done.set_result(None)
+
+    await channel.basic_consume(QUEUE, on_message, no_ack=True)
+    await done
+
+
+async def main() -> None:
+    storage = Storage()
+    amqp_server = AmqpServer(storage, host="localhost")
+    async with create_amqp_mock(HttpServer(storage, host="localhost"), amqp_server):
+        connection = await aiormq.connect(f"amqp://localhost:{amqp_server.port}/")
+
+        for name, scenario in [("basic_get", run_basic_get),
+                               ("basic_consume", run_basic_consume)]:
+            await fill_queue(storage)
+            channel = await connection.channel()
+
+            started_at = time.perf_counter()
+            await scenario(channel)
+            elapsed = time.perf_counter() - started_at
+
+            print(f"{name:<14} {MESSAGES / elapsed:10.0f} msg/s")
+            await channel.close()
+
+        await connection.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
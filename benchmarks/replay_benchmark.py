@@ -0,0 +1,63 @@
+import asyncio
+import sys
+import tempfile
+from pathlib import Path
+from typing import List
+
+import aiormq
+
+from amqp_mock import AmqpServer, HttpServer, Storage, create_amqp_mock
+from amqp_mock.amqp_server import replay_recording
+
+MESSAGES = 10_000
+QUEUE = "benchmark_queue"
+ROUNDS = 3
+
+
+async def record_session(record_dir: str) -> List[str]:
+    # Used when no recordings are given: publishes and consumes MESSAGES messages
+    storage = Storage()
+    amqp_server = AmqpServer(storage, host="localhost", record_dir=record_dir)
+    async with create_amqp_mock(HttpServer(storage, host="localhost"), amqp_server):
+        connection = await aiormq.connect(f"amqp://localhost:{amqp_server.port}/")
+        channel = await connection.channel()
+        await channel.queue_declare(QUEUE)
+        for index in range(MESSAGES):
+            await channel.basic_publish(str(index).encode(), routing_key=QUEUE)
+
+        received = 0
+        done = asyncio.get_running_loop().create_future()
+
+        async def on_message(message: aiormq.abc.DeliveredMessage) -> None:
+            nonlocal received
+            received += 1
+            if received == MESSAGES:
+                done.set_result(None)
+            await channel.basic_ack(message.delivery.delivery_tag)
+
+        await channel.basic_consume(QUEUE, on_message)
+        await done
+        await connection.close()
+    return sorted(str(path) for path in Path(record_dir).glob("*.amqprec"))
+
+
+async def replay(path: str) -> None:
+    for _ in range(ROUNDS):
+        storage = Storage()
+        amqp_server = AmqpServer(storage, host="localhost")
+        async with create_amqp_mock(HttpServer(storage, host="localhost"), amqp_server):
+            result = await replay_recording(path, "localhost", amqp_server.port or 0)
+            megabytes = (result.bytes_sent + result.bytes_received) / 2 ** 20
+            print(f"{Path(path).name:<24} {result.elapsed:8.3f} s "
+                  f"{megabytes / result.elapsed:8.1f} MiB/s "
+                  f"{amqp_server.metrics.frames_received / result.elapsed:10.0f} frames/s")
+
+
+async def main(paths: List[str]) -> None:
+    with tempfile.TemporaryDirectory() as record_dir:
+        for path in paths or await record_session(record_dir):
+            await replay(path)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:]))
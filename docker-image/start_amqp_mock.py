@@ -2,8 +2,14 @@ import asyncio
 import logging
 import signal
 from os import environ
+from typing import Optional
 
-from amqp_mock import AmqpServer, HttpServer, Storage, create_amqp_mock
+from amqp_mock import AmqpMockSupervisor, AmqpServer, HttpServer, Storage, create_amqp_mock
+
+
+def get_env_int(name: str) -> Optional[int]:
+    value = environ.get(name)
+    return int(value) if value else None
 
 
 async def run() -> None:
@@ -11,7 +17,17 @@ async def run() -> None:
     future = loop.create_future()
     loop.add_signal_handler(signal.SIGINT, future.set_result, None)
 
-    storage = Storage()
+    workers = get_env_int("WORKERS")
+    if workers:
+        # Worker N listens on HTTP 8000+N and AMQP 5700+N, discovery on 80
+        async with AmqpMockSupervisor(workers, port=80, http_port=8000, amqp_port=5700):
+            await future
+        return
+
+    storage = Storage(max_messages=get_env_int("MAX_MESSAGES"),
+                      max_bytes=get_env_int("MAX_BYTES"),
+                      max_exchange_messages=get_env_int("MAX_EXCHANGE_MESSAGES"),
+                      max_history=get_env_int("MAX_HISTORY"))
     http_server = HttpServer(storage, port=80)
     amqp_server = AmqpServer(storage, port=5672)
     async with create_amqp_mock(http_server, amqp_server):
@@ -1,6 +1,6 @@
 import asyncio
 from types import TracebackType
-from typing import Dict, List, Optional, Type, Union
+from typing import Any, Dict, List, Optional, Type, Union
 
 import aiormq
 from aiormq.abc import DeliveredMessage
@@ -26,26 +26,36 @@ class AmqpClient:
         await self._channel.close()
         await self._connection.close()
 
-    async def basic_qos(self, prefetch_count: int) -> None:
-        res = await self._channel.basic_qos(prefetch_count=prefetch_count)
+    async def basic_qos(self, prefetch_count: int, global_: bool = False) -> None:
+        res = await self._channel.basic_qos(prefetch_count=prefetch_count, global_=global_)
         assert isinstance(res, commands.Basic.QosOk)
 
     async def declare_exchange(self, exchange_name: str, exchange_type: str = "direct") -> None:
         res = await self._channel.exchange_declare(exchange_name, exchange_type=exchange_type)
         assert isinstance(res, commands.Exchange.DeclareOk)
 
-    async def declare_queue(self, queue_name: str) -> None:
-        res = await self._channel.queue_declare(queue_name)
+    async def declare_queue(self, queue_name: str,
+                            arguments: Optional[Dict[str, Any]] = None) -> None:
+        res = await self._channel.queue_declare(queue_name, arguments=arguments)
         assert isinstance(res, commands.Queue.DeclareOk)
 
-    async def queue_bind(self, queue_name: str, exchange_name: str,
-                         routing_key: str = "") -> None:
-        res = await self._channel.queue_bind(queue_name, exchange_name, routing_key=routing_key)
+    async def queue_bind(self, queue_name: str, exchange_name: str, routing_key: str = "",
+                         arguments: Optional[Dict[str, Any]] = None) -> None:
+        res = await self._channel.queue_bind(queue_name, exchange_name, routing_key=routing_key,
+                                             arguments=arguments)
         assert isinstance(res, commands.Queue.BindOk)
 
-    async def publish(self, message: bytes, exchange_name: str, routing_key: str = "") -> None:
+    async def exchange_bind(self, destination: str, source: str, routing_key: str = "",
+                            arguments: Optional[Dict[str, Any]] = None) -> None:
+        res = await self._channel.exchange_bind(destination, source, routing_key=routing_key,
+                                                arguments=arguments)
+        assert isinstance(res, commands.Exchange.BindOk)
+
+    async def publish(self, message: bytes, exchange_name: str, routing_key: str = "",
+                      headers: Optional[Dict[str, Any]] = None) -> None:
+        properties = commands.Basic.Properties(headers=headers)
         res = await self._channel.basic_publish(message, exchange=exchange_name,
-                                                routing_key=routing_key)
+                                                routing_key=routing_key, properties=properties)
         assert isinstance(res, commands.Basic.Ack)
 
     async def _on_message(self, message: DeliveredMessage) -> None:
@@ -76,6 +86,38 @@ class AmqpClient:
         assert isinstance(res, commands.Basic.ConsumeOk)
         self._consumer_tags[queue_name] = res.consumer_tag
 
+    async def consume_manual_ack(self, queue_name: str) -> None:
+        res = await self._channel.basic_consume(queue_name, self._on_message, no_ack=False)
+        assert isinstance(res, commands.Basic.ConsumeOk)
+        self._consumer_tags[queue_name] = res.consumer_tag
+
+    async def basic_ack(self, delivery_tag: int, multiple: bool = False) -> None:
+        res = await self._channel.basic_ack(delivery_tag, multiple=multiple)
+        assert res is None
+
+    async def basic_nack(self, delivery_tag: int, multiple: bool = False) -> None:
+        res = await self._channel.basic_nack(delivery_tag, multiple=multiple)
+        assert res is None
+
+    async def get(self, queue_name: str, no_ack: bool = True) -> Optional[DeliveredMessage]:
+        res = await self._channel.basic_get(queue_name, no_ack=no_ack)
+        if isinstance(res.delivery, commands.Basic.GetEmpty):
+            return None
+        assert isinstance(res.delivery, commands.Basic.GetOk)
+        return res
+
+    async def tx_select(self) -> None:
+        res = await self._channel.tx_select()
+        assert isinstance(res, commands.Tx.SelectOk)
+
+    async def tx_commit(self) -> None:
+        res = await self._channel.tx_commit()
+        assert isinstance(res, commands.Tx.CommitOk)
+
+    async def tx_rollback(self) -> None:
+        res = await self._channel.tx_rollback()
+        assert isinstance(res, commands.Tx.RollbackOk)
+
     async def consume_cancel(self, queue_name: str) -> None:
         consumer_tag = self._consumer_tags[queue_name]
         res = await self._channel.basic_cancel(consumer_tag)
@@ -1,7 +1,13 @@
 import json
-from typing import Any, Dict, List, Union
+from asyncio import StreamReader, StreamWriter, wait_for
+from typing import Any, Dict, List, Tuple, Type, Union
 from uuid import uuid4
 
+from pamqp import commands
+from pamqp.exceptions import UnmarshalingException
+from pamqp.frame import FrameTypes, marshal, unmarshal
+from pamqp.header import ProtocolHeader
+
 from amqp_mock import Message, QueuedMessage
 
 
@@ -18,3 +24,32 @@ _MessageType = Union[QueuedMessage, Message]
 
 def to_dict(smth: List[_MessageType]) -> List[Dict[str, Any]]:
     return [x.to_dict() for x in smth]
+
+
+def write_frames(writer: StreamWriter, frames: List[Tuple[int, FrameTypes]]) -> None:
+    # A single write, so that the frames are pipelined
+    writer.write(b"".join(marshal(frame, channel_id) for channel_id, frame in frames))
+
+
+def write_handshake(writer: StreamWriter, *, heartbeat: int = 0) -> None:
+    writer.write(ProtocolHeader().marshal())
+    write_frames(writer, [
+        (0, commands.Connection.StartOk()),
+        (0, commands.Connection.TuneOk(heartbeat=heartbeat)),
+        (0, commands.Connection.Open()),
+    ])
+
+
+async def read_until(reader: StreamReader, frame_type: Type[FrameTypes]) -> List[FrameTypes]:
+    frames: List[FrameTypes] = []
+    buffer = b""
+    while not any(isinstance(x, frame_type) for x in frames):
+        buffer += await wait_for(reader.read(2 ** 16), timeout=1.0)
+        while True:
+            try:
+                size, _, frame = unmarshal(buffer)
+            except UnmarshalingException:
+                break
+            frames.append(frame)
+            buffer = buffer[size:]
+    return frames
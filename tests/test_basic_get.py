@@ -0,0 +1,71 @@
+import pytest
+
+from amqp_mock import Message, MessageStatus
+
+from ._test_utils.fixtures import amqp_client, mock_client, mock_server
+from ._test_utils.helpers import to_binary
+from ._test_utils.steps import given, then, when
+
+__all__ = ("mock_client", "mock_server", "amqp_client",)
+
+
+@pytest.mark.asyncio
+async def test_basic_get(*, mock_server, mock_client, amqp_client):
+    with given:
+        queue = "test_queue"
+        message1, message2 = "text1", "text2"
+        await mock_client.publish_message(queue, Message(message1))
+        await mock_client.publish_message(queue, Message(message2))
+
+    with when:
+        result = await amqp_client.get(queue)
+
+    with then:
+        assert result.body == to_binary(message1)
+        assert result.delivery.message_count == 1
+
+        history = await mock_client.get_queue_message_history(queue)
+        assert [x.status for x in history] == [MessageStatus.INIT, MessageStatus.CONSUMING]
+
+
+@pytest.mark.asyncio
+async def test_basic_get_empty(*, mock_server, mock_client, amqp_client):
+    with given:
+        queue = "test_queue"
+        await amqp_client.declare_queue(queue)
+
+    with when:
+        result = await amqp_client.get(queue)
+
+    with then:
+        assert result is None
+
+
+@pytest.mark.asyncio
+async def test_basic_get_ack(*, mock_server, mock_client, amqp_client):
+    with given:
+        queue = "test_queue"
+        await mock_client.publish_message(queue, Message("text"))
+        result = await amqp_client.get(queue, no_ack=False)
+
+    with when:
+        await amqp_client.basic_ack(result.delivery.delivery_tag)
+
+    with then:
+        history = await mock_client.get_queue_message_history(queue)
+        assert history[0].status == MessageStatus.ACKED
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("body", [b'{"id":1}', b"text", b"\x00\xff"])
+async def test_basic_get_published_body(body, *, mock_server, mock_client, amqp_client):
+    with given:
+        queue = "test_queue"
+        await amqp_client.declare_queue(queue)
+        await amqp_client.publish(body, "", routing_key=queue)
+
+    with when:
+        result = await amqp_client.get(queue)
+
+    with then:
+        assert result.body == body
@@ -0,0 +1,102 @@
+import pytest
+
+from amqp_mock import Message
+
+from ._test_utils.fixtures import amqp_client, mock_client, mock_server
+from ._test_utils.helpers import to_binary
+from ._test_utils.steps import given, then, when
+
+__all__ = ("mock_client", "mock_server", "amqp_client",)
+
+
+@pytest.mark.asyncio
+async def test_basic_qos_limits_unacked_deliveries(*, mock_server, mock_client, amqp_client):
+    with given:
+        queue = "test_queue"
+        for message in ["text1", "text2", "text3"]:
+            await mock_client.publish_message(queue, Message(message))
+        await amqp_client.basic_qos(prefetch_count=2)
+
+    with when:
+        await amqp_client.consume_manual_ack(queue)
+
+    with then:
+        await amqp_client.wait_for(message_count=2)
+        await amqp_client.wait(seconds=0.1)
+        messages = amqp_client.get_consumed_messages()
+        assert len(messages) == 2
+        assert messages[0].body == to_binary("text1")
+        assert messages[1].body == to_binary("text2")
+
+
+@pytest.mark.asyncio
+async def test_basic_qos_resumes_on_ack(*, mock_server, mock_client, amqp_client):
+    with given:
+        queue = "test_queue"
+        for message in ["text1", "text2"]:
+            await mock_client.publish_message(queue, Message(message))
+        await amqp_client.basic_qos(prefetch_count=1)
+        await amqp_client.consume_manual_ack(queue)
+        messages = await amqp_client.wait_for(message_count=1)
+
+    with when:
+        await amqp_client.basic_ack(messages[0].delivery.delivery_tag)
+
+    with then:
+        messages = await amqp_client.wait_for(message_count=2)
+        assert len(messages) == 2
+        assert messages[1].body == to_binary("text2")
+
+
+@pytest.mark.asyncio
+async def test_basic_qos_resumes_on_nack(*, mock_server, mock_client, amqp_client):
+    with given:
+        queue = "test_queue"
+        for message in ["text1", "text2"]:
+            await mock_client.publish_message(queue, Message(message))
+        await amqp_client.basic_qos(prefetch_count=1)
+        await amqp_client.consume_manual_ack(queue)
+        messages = await amqp_client.wait_for(message_count=1)
+
+    with when:
+        await amqp_client.basic_nack(messages[0].delivery.delivery_tag)
+
+    with then:
+        messages = await amqp_client.wait_for(message_count=2)
+        assert len(messages) == 2
+
+
+@pytest.mark.asyncio
+async def test_basic_qos_global(*, mock_server, mock_client, amqp_client):
+    with given:
+        queue1, queue2 = "test_queue1", "test_queue2"
+        for queue in [queue1, queue2]:
+            await mock_client.publish_message(queue, Message("text1"))
+            await mock_client.publish_message(queue, Message("text2"))
+        await amqp_client.basic_qos(prefetch_count=3, global_=True)
+
+    with when:
+        await amqp_client.consume_manual_ack(queue1)
+        await amqp_client.consume_manual_ack(queue2)
+
+    with then:
+        await amqp_client.wait_for(message_count=3)
+        await amqp_client.wait(seconds=0.1)
+        messages = amqp_client.get_consumed_messages()
+        assert len(messages) == 3
+
+
+@pytest.mark.asyncio
+async def test_basic_qos_ignored_for_no_ack_consumer(*, mock_server, mock_client, amqp_client):
+    with given:
+        queue = "test_queue"
+        for message in ["text1", "text2"]:
+            await mock_client.publish_message(queue, Message(message))
+        await amqp_client.basic_qos(prefetch_count=1)
+
+    with when:
+        await amqp_client.consume(queue)
+
+    with then:
+        messages = await amqp_client.wait_for(message_count=2)
+        assert len(messages) == 2
@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+from pamqp import commands
+from pamqp.body import ContentBody
+from pamqp.header import ContentHeader
+
+from ._test_utils.fixtures import mock_client, mock_server
+from ._test_utils.helpers import to_binary, write_frames, write_handshake
+from ._test_utils.steps import given, then, when
+
+__all__ = ("mock_client", "mock_server",)
+
+
+@pytest.mark.asyncio
+async def test_interleaved_publishes_on_channels(*, mock_server, mock_client):
+    with given:
+        exchange = "test_exchange"
+        body1, body2 = to_binary("text1"), to_binary("text2")
+        reader, writer = await asyncio.open_connection("localhost", 5674)
+        write_handshake(writer)
+        write_frames(writer, [
+            (1, commands.Channel.Open()),
+            (2, commands.Channel.Open()),
+        ])
+
+    with when:
+        write_frames(writer, [
+            (1, commands.Basic.Publish(exchange=exchange, routing_key="key1")),
+            (2, commands.Basic.Publish(exchange=exchange, routing_key="key2")),
+            (1, ContentHeader(body_size=len(body1))),
+            (2, ContentHeader(body_size=len(body2))),
+            (2, ContentBody(body2)),
+            (1, ContentBody(body1)),
+        ])
+        await writer.drain()
+        await asyncio.sleep(0.1)
+
+    with then:
+        messages = await mock_client.get_exchange_messages(exchange)
+        assert [(x.routing_key, x.value) for x in messages] == [
+            ("key1", "text1"),
+            ("key2", "text2"),
+        ]
+
+        writer.close()
+        await writer.wait_closed()
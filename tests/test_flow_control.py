@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+from pamqp import commands
+from pamqp.body import ContentBody
+from pamqp.header import ContentHeader
+
+from amqp_mock import AmqpServer, HttpServer, Message, Storage, create_amqp_mock
+
+from ._test_utils.amqp_client import AmqpClient
+from ._test_utils.helpers import to_binary, write_frames, write_handshake
+from ._test_utils.steps import given, then, when
+
+
+@pytest.mark.asyncio
+async def test_block_publisher_over_budget():
+    with given:
+        storage = Storage(max_messages=2)
+        amqp_server = AmqpServer(storage, port=5674)
+        exchange, queue = "test_exchange", "test_queue"
+
+    async with given, \
+            create_amqp_mock(HttpServer(storage, port=8080), amqp_server), \
+            AmqpClient(amqp_server.host, amqp_server.port) as amqp_client, \
+            AmqpClient(amqp_server.host, amqp_server.port) as consumer_client:
+        with when:
+            await amqp_client.queue_bind(queue, exchange)
+            for message in ["text1", "text2", "text3"]:
+                await amqp_client.publish(to_binary(message), exchange)
+            publish = asyncio.ensure_future(amqp_client.publish(to_binary("text4"), exchange))
+            await asyncio.sleep(0.1)
+
+        with then:
+            assert storage.blocked
+            assert not publish.done()
+
+            # Frames of a blocked connection are held back, consuming needs another one
+            await consumer_client.consume(queue)
+            await asyncio.wait_for(publish, timeout=1.0)
+            await consumer_client.wait_for(message_count=4)
+            assert not storage.blocked
+
+
+@pytest.mark.asyncio
+async def test_exchange_log_is_not_charged():
+    with given:
+        storage = Storage(max_messages=10)
+        amqp_server = AmqpServer(storage, port=5674)
+        exchange, queue = "test_exchange", "test_queue"
+
+    async with given, \
+            create_amqp_mock(HttpServer(storage, port=8080), amqp_server) as mock, \
+            AmqpClient(amqp_server.host, amqp_server.port) as amqp_client:
+        await amqp_client.queue_bind(queue, exchange)
+        await amqp_client.consume(queue)
+
+        with when:
+            for index in range(30):
+                await asyncio.wait_for(amqp_client.publish(to_binary(index), exchange),
+                                       timeout=1.0)
+
+        with then:
+            await amqp_client.wait_for(message_count=30)
+            assert not storage.blocked
+            assert storage.message_count == 0
+
+            messages = await mock.client.get_exchange_messages(exchange)
+            assert len(messages) == 30
+
+
+@pytest.mark.asyncio
+async def test_unblock_on_consume():
+    with given:
+        storage = Storage(max_messages=2)
+        amqp_server = AmqpServer(storage, port=5674)
+        queue = "test_queue"
+
+    async with given, \
+            create_amqp_mock(HttpServer(storage, port=8080), amqp_server) as mock, \
+            AmqpClient(amqp_server.host, amqp_server.port) as amqp_client:
+        with when:
+            for message in ["text1", "text2", "text3"]:
+                await mock.client.publish_message(queue, Message(message))
+            assert storage.blocked
+
+            await amqp_client.consume(queue)
+
+        with then:
+            await amqp_client.wait_for(message_count=3)
+            assert not storage.blocked
+
+
+def publish_frames(queue, body):
+    return [
+        (1, commands.Basic.Publish(exchange="", routing_key=queue)),
+        (1, ContentHeader(body_size=len(body))),
+        (1, ContentBody(body)),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_shutdown_with_blocked_publisher():
+    with given:
+        storage = Storage(max_messages=1)
+        amqp_server = AmqpServer(storage, port=5674)
+        mock = create_amqp_mock(HttpServer(storage, port=8080), amqp_server)
+        await mock.start()
+        queue = "test_queue"
+
+        reader, writer = await asyncio.open_connection("localhost", amqp_server.port)
+        write_handshake(writer)
+        write_frames(writer, [
+            (1, commands.Channel.Open()),
+            (1, commands.Queue.Declare(queue=queue)),
+            *publish_frames(queue, b"text1"),
+            *publish_frames(queue, b"text2"),
+        ])
+        await writer.drain()
+        await asyncio.sleep(0.1)
+        assert storage.blocked
+
+        # Held back unprocessed, enough for the connection not to be read from at all
+        write_frames(writer, publish_frames(queue, b"x" * 2 ** 21))
+        await asyncio.sleep(0.1)
+
+    with when:
+        await asyncio.wait_for(mock.stop(), timeout=1.0)
+
+    with then:
+        assert amqp_server.connections == []
+        assert await storage.get_queue_size(queue) == 2
+
+        writer.close()
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+from pamqp import commands
+from pamqp.body import ContentBody
+from pamqp.frame import marshal
+from pamqp.header import ContentHeader, ProtocolHeader
+
+from amqp_mock import AmqpServer, HttpServer, Message, Storage, create_amqp_mock
+
+from ._test_utils.fixtures import mock_client, mock_server
+from ._test_utils.helpers import to_binary, write_frames, write_handshake
+from ._test_utils.steps import given, then, when
+
+__all__ = ("mock_client", "mock_server",)
+
+
+@pytest.mark.asyncio
+async def test_frames_split_across_reads(*, mock_server, mock_client):
+    with given:
+        exchange = "test_exchange"
+        body = to_binary("text")
+        frames = [
+            (0, commands.Connection.StartOk()),
+            (0, commands.Connection.TuneOk()),
+            (0, commands.Connection.Open()),
+            (1, commands.Channel.Open()),
+            (1, commands.Basic.Publish(exchange=exchange)),
+            (1, ContentHeader(body_size=len(body))),
+            (1, ContentBody(body)),
+        ]
+        data = ProtocolHeader().marshal() + b"".join(
+            marshal(frame, channel_id) for channel_id, frame in frames)
+        reader, writer = await asyncio.open_connection("localhost", 5674)
+
+    with when:
+        # A byte at a time, so that every frame (and frame header) is split
+        for index in range(len(data)):
+            writer.write(data[index:index + 1])
+            await writer.drain()
+            await asyncio.sleep(0.001)
+        await asyncio.sleep(0.1)
+
+    with then:
+        messages = await mock_client.get_exchange_messages(exchange)
+        assert [x.value for x in messages] == ["text"]
+
+        writer.close()
+        await writer.wait_closed()
+
+
+@pytest.mark.asyncio
+async def test_wait_for_slow_consumer():
+    with given:
+        storage = Storage()
+        amqp_server = AmqpServer(storage, port=5674, write_high_water=2 ** 16)
+        queue = "test_queue"
+        count, body = 400, "x" * 2 ** 16
+
+    async with given, create_amqp_mock(HttpServer(storage, port=8080), amqp_server) as mock:
+        for _ in range(count):
+            await mock.client.publish_message(queue, Message(body))
+
+        reader, writer = await asyncio.open_connection("localhost", amqp_server.port)
+        write_handshake(writer)
+        write_frames(writer, [
+            (1, commands.Channel.Open()),
+            (1, commands.Basic.Consume(queue=queue, consumer_tag="consumer", no_ack=True)),
+        ])
+
+        with when:
+            # The client doesn't read, deliveries wait for it once the buffers are full
+            await asyncio.sleep(0.5)
+            delivered_before = amqp_server.metrics.delivered
+
+            while amqp_server.metrics.delivered < count:
+                await asyncio.wait_for(reader.read(2 ** 20), timeout=1.0)
+
+        with then:
+            assert 0 < delivered_before < count
+            assert await storage.get_queue_size(queue) == 0
+
+            writer.close()
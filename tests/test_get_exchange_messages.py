@@ -91,3 +91,32 @@ async def test_get_exchange_message_published_with_routing_key(routing_key, *, m
         assert len(messages) == 1
         assert messages[0].value == message
         assert messages[0].routing_key == routing_key
+
+
+@pytest.mark.asyncio
+async def test_get_exchange_message_large(*, mock_server, mock_client, amqp_client):
+    with given:
+        exchange = "test_exchange"
+        message = {"id": random_uuid(), "payload": "x" * 2 ** 16}
+        await amqp_client.publish(to_binary(message), exchange)
+
+    with when:
+        messages = await mock_client.get_exchange_messages(exchange)
+
+    with then:
+        assert len(messages) == 1
+        assert messages[0].value == message
+
+
+@pytest.mark.asyncio
+async def test_get_exchange_message_not_json(*, mock_server, mock_client, amqp_client):
+    with given:
+        exchange = "test_exchange"
+        await amqp_client.publish(b"text", exchange)
+
+    with when:
+        messages = await mock_client.get_exchange_messages(exchange)
+
+    with then:
+        assert len(messages) == 1
+        assert messages[0].value == "text"
@@ -180,3 +180,59 @@ async def test_get_queue_message_history_with_bound_queue(*, mock_server,
         assert history[0].message.exchange == exchange
         assert history[0].queue == queue
         assert history[0].status == MessageStatus.INIT
+
+
+@pytest.mark.asyncio
+async def test_get_queue_message_history_acked_multiple(*, mock_server,
+                                                        mock_client, amqp_client):
+    with given:
+        queue = "test_queue"
+        for message in ["text1", "text2", "text3"]:
+            await mock_client.publish_message(queue, Message(message))
+        await amqp_client.consume_manual_ack(queue)
+        messages = await amqp_client.wait_for(message_count=3)
+        await amqp_client.basic_ack(messages[1].delivery.delivery_tag, multiple=True)
+
+    with when:
+        history = await mock_client.get_queue_message_history(queue)
+
+    with then:
+        assert [x.status for x in history] == [
+            MessageStatus.CONSUMING,
+            MessageStatus.ACKED,
+            MessageStatus.ACKED,
+        ]
+
+
+@pytest.mark.asyncio
+async def test_get_queue_message_history_nacked_multiple(*, mock_server,
+                                                         mock_client, amqp_client):
+    with given:
+        queue = "test_queue"
+        for message in ["text1", "text2"]:
+            await mock_client.publish_message(queue, Message(message))
+        await amqp_client.consume_manual_ack(queue)
+        messages = await amqp_client.wait_for(message_count=2)
+        await amqp_client.basic_nack(messages[1].delivery.delivery_tag, multiple=True)
+
+    with when:
+        history = await mock_client.get_queue_message_history(queue)
+
+    with then:
+        assert [x.status for x in history] == [MessageStatus.NACKED, MessageStatus.NACKED]
+
+
+@pytest.mark.asyncio
+async def test_get_queue_message_history_specific_queue(*, mock_server, mock_client):
+    with given:
+        queue1, queue2 = "test_queue1", "test_queue2"
+        message1, message2 = "text1", "text2"
+        await mock_client.publish_message(queue1, Message(message1))
+        await mock_client.publish_message(queue2, Message(message2))
+
+    with when:
+        history = await mock_client.get_queue_message_history(queue1)
+
+    with then:
+        assert len(history) == 1
+        assert history[0].message.value == message1
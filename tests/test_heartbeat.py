@@ -0,0 +1,139 @@
+import asyncio
+
+import pytest
+from pamqp import commands
+from pamqp.body import ContentBody
+from pamqp.header import ContentHeader
+
+from amqp_mock import AmqpServer, HttpServer, Message, MessageStatus, Storage, create_amqp_mock
+
+from ._test_utils.helpers import write_frames, write_handshake
+from ._test_utils.steps import given, then, when
+
+
+@pytest.mark.asyncio
+async def test_reap_connection_without_heartbeats():
+    with given:
+        storage = Storage()
+        amqp_server = AmqpServer(storage, port=5674, heartbeat=1)
+        queue = "test_queue"
+
+    async with given, create_amqp_mock(HttpServer(storage, port=8080), amqp_server) as mock:
+        with when:
+            reader, writer = await asyncio.open_connection("localhost", amqp_server.port)
+            write_handshake(writer, heartbeat=1)
+            write_frames(writer, [
+                (1, commands.Channel.Open()),
+                (1, commands.Basic.Consume(queue=queue, consumer_tag="consumer")),
+            ])
+            await writer.drain()
+            await asyncio.sleep(0.1)
+            assert len(amqp_server.connections) == 1
+
+            await asyncio.sleep(3)
+
+        with then:
+            assert amqp_server.connections == []
+            assert amqp_server.reaped_connections == 1
+
+            await mock.client.publish_message(queue, Message("text"))
+            history = await mock.client.get_queue_message_history(queue)
+            assert len(history) == 1
+            assert history[0].status == MessageStatus.INIT
+
+            writer.close()
+
+
+@pytest.mark.asyncio
+async def test_reap_blocked_connection_without_heartbeats():
+    with given:
+        storage = Storage(max_messages=0)
+        amqp_server = AmqpServer(storage, port=5674, heartbeat=1)
+        queue = "test_queue"
+
+    async with given, create_amqp_mock(HttpServer(storage, port=8080), amqp_server):
+        with when:
+            reader, writer = await asyncio.open_connection("localhost", amqp_server.port)
+            write_handshake(writer, heartbeat=1)
+            write_frames(writer, [
+                (1, commands.Channel.Open()),
+                (1, commands.Queue.Declare(queue=queue)),
+                (1, commands.Basic.Publish(exchange="", routing_key=queue)),
+                (1, ContentHeader(body_size=4)),
+                (1, ContentBody(b"text")),
+            ])
+            await writer.drain()
+            await asyncio.sleep(0.1)
+            assert storage.blocked
+
+            await asyncio.sleep(3)
+
+        with then:
+            assert amqp_server.connections == []
+            assert amqp_server.reaped_connections == 1
+
+            writer.close()
+
+
+@pytest.mark.asyncio
+async def test_reap_paused_connection_of_dead_client():
+    with given:
+        storage = Storage(max_messages=0)
+        amqp_server = AmqpServer(storage, port=5674, heartbeat=1)
+        queue = "test_queue"
+        body = b"x" * 2 ** 21
+
+    async with given, create_amqp_mock(HttpServer(storage, port=8080), amqp_server):
+        with when:
+            reader, writer = await asyncio.open_connection("localhost", amqp_server.port)
+            write_handshake(writer, heartbeat=1)
+            write_frames(writer, [
+                (1, commands.Channel.Open()),
+                (1, commands.Queue.Declare(queue=queue)),
+                (1, commands.Basic.Publish(exchange="", routing_key=queue)),
+                (1, ContentHeader(body_size=4)),
+                (1, ContentBody(b"text")),
+            ])
+            await writer.drain()
+            await asyncio.sleep(0.1)
+            # Held back unprocessed, enough for the connection not to be read from at all
+            write_frames(writer, [
+                (1, commands.Basic.Publish(exchange="", routing_key=queue)),
+                (1, ContentHeader(body_size=len(body))),
+                (1, ContentBody(body)),
+            ])
+            await asyncio.sleep(0.5)
+            assert len(amqp_server.connections) == 1
+
+            writer.transport.abort()
+            await asyncio.sleep(3)
+
+        with then:
+            assert amqp_server.connections == []
+            assert amqp_server.reaped_connections == 1
+
+
+@pytest.mark.asyncio
+async def test_release_disconnected_connection():
+    with given:
+        storage = Storage()
+        amqp_server = AmqpServer(storage, port=5674)
+
+    async with given, create_amqp_mock(HttpServer(storage, port=8080), amqp_server):
+        with when:
+            reader, writer = await asyncio.open_connection("localhost", amqp_server.port)
+            write_handshake(writer)
+            write_frames(writer, [
+                (1, commands.Channel.Open()),
+                (1, commands.Basic.Consume(queue="test_queue", consumer_tag="consumer")),
+            ])
+            await writer.drain()
+            await asyncio.sleep(0.1)
+
+            writer.close()
+            await writer.wait_closed()
+            await asyncio.sleep(0.1)
+
+        with then:
+            assert amqp_server.connections == []
+            assert amqp_server.reaped_connections == 0
@@ -0,0 +1,95 @@
+import asyncio
+import struct
+
+import pytest
+from pamqp import commands
+from pamqp.constants import FRAME_BODY
+
+from amqp_mock import AmqpServer, HttpServer, Message, Storage, create_amqp_mock
+
+from ._test_utils.amqp_client import AmqpClient
+from ._test_utils.helpers import random_uuid, read_until, to_binary, write_frames, write_handshake
+from ._test_utils.steps import given, then, when
+
+
+@pytest.mark.asyncio
+async def test_publish_message_split_into_frames():
+    with given:
+        storage = Storage()
+        amqp_server = AmqpServer(storage, port=5674, frame_max=4096)
+        exchange = "test_exchange"
+        message = {"id": random_uuid(), "payload": "x" * 100_000}
+
+    async with given, \
+            create_amqp_mock(HttpServer(storage, port=8080), amqp_server) as mock, \
+            AmqpClient(amqp_server.host, amqp_server.port) as amqp_client:
+        with when:
+            await amqp_client.publish(to_binary(message), exchange)
+
+        with then:
+            messages = await mock.client.get_exchange_messages(exchange)
+            assert len(messages) == 1
+            assert messages[0].value == message
+
+
+@pytest.mark.asyncio
+async def test_consume_message_split_into_frames():
+    with given:
+        storage = Storage()
+        amqp_server = AmqpServer(storage, port=5674, frame_max=4096)
+        queue = "test_queue"
+        message = {"id": random_uuid(), "payload": "x" * 100_000}
+
+    async with given, \
+            create_amqp_mock(HttpServer(storage, port=8080), amqp_server) as mock, \
+            AmqpClient(amqp_server.host, amqp_server.port) as amqp_client:
+        with when:
+            await mock.client.publish_message(queue, Message(message))
+
+        with then:
+            await amqp_client.consume(queue)
+            messages = await amqp_client.wait_for(message_count=1)
+            assert len(messages) == 1
+            assert messages[0].body == to_binary(message)
+
+
+@pytest.mark.asyncio
+async def test_publish_empty_message():
+    with given:
+        storage = Storage()
+        amqp_server = AmqpServer(storage, port=5674)
+        exchange = "test_exchange"
+
+    async with given, \
+            create_amqp_mock(HttpServer(storage, port=8080), amqp_server) as mock, \
+            AmqpClient(amqp_server.host, amqp_server.port) as amqp_client:
+        with when:
+            await amqp_client.publish(b"", exchange)
+
+        with then:
+            messages = await mock.client.get_exchange_messages(exchange)
+            assert len(messages) == 1
+
+
+@pytest.mark.asyncio
+async def test_reject_frame_over_frame_max():
+    with given:
+        storage = Storage()
+        amqp_server = AmqpServer(storage, port=5674, frame_max=4096)
+
+    async with given, create_amqp_mock(HttpServer(storage, port=8080), amqp_server):
+        with when:
+            reader, writer = await asyncio.open_connection("localhost", amqp_server.port)
+            write_handshake(writer)
+            write_frames(writer, [(1, commands.Channel.Open())])
+            # Only the header of a 1 GiB body frame
+            writer.write(struct.pack(">BHI", FRAME_BODY, 1, 2 ** 30))
+            await writer.drain()
+            frames = await read_until(reader, commands.Connection.Close)
+            await asyncio.sleep(0.1)
+
+        with then:
+            assert frames[-1].reply_code == 501
+            assert amqp_server.connections == []
+
+            writer.close()
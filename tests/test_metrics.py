@@ -0,0 +1,53 @@
+import pytest
+from aiohttp import ClientSession
+
+from ._test_utils.fixtures import amqp_client, mock_client, mock_server
+from ._test_utils.helpers import random_uuid, to_binary
+from ._test_utils.steps import given, then, when
+
+__all__ = ("mock_client", "mock_server", "amqp_client",)
+
+
+@pytest.mark.asyncio
+async def test_get_metrics(*, mock_server, mock_client, amqp_client):
+    with given:
+        exchange, queue = "test_exchange", "test_queue"
+        await amqp_client.declare_exchange(exchange)
+        await amqp_client.queue_bind(queue, exchange, routing_key=queue)
+        await amqp_client.publish(to_binary({"id": random_uuid()}), exchange, routing_key=queue)
+        await amqp_client.consume(queue)
+        await amqp_client.wait_for(message_count=1)
+
+    with when:
+        metrics = await mock_client.get_metrics()
+
+    with then:
+        assert metrics["connections"] == 1
+        assert metrics["published"] == 1
+        assert metrics["delivered"] == 1
+        assert metrics["frames_received"] > 0
+        assert metrics["bytes_sent"] > 0
+
+        publish = metrics["methods"]["Basic.Publish"]
+        assert publish["count"] == 1
+        assert publish["buckets"]["+Inf"] == 1
+
+        assert len(metrics["per_connection"]) == 1
+        assert metrics["per_connection"][0]["published"] == 1
+
+
+@pytest.mark.asyncio
+async def test_get_metrics_prometheus(*, mock_server, mock_client, amqp_client):
+    with given:
+        await amqp_client.publish(to_binary({"id": random_uuid()}), "test_exchange")
+
+    with when:
+        async with ClientSession() as session:
+            async with session.get("http://localhost:8080/metrics?format=prometheus") as resp:
+                text = await resp.text()
+
+    with then:
+        lines = text.splitlines()
+        assert "amqp_mock_connections 1" in lines
+        assert "amqp_mock_published_total 1" in lines
+        assert 'amqp_mock_method_latency_seconds_count{method="Basic.Publish"} 1' in lines
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+from pamqp import commands
+from pamqp.body import ContentBody
+from pamqp.header import ContentHeader
+
+from amqp_mock import Message
+
+from ._test_utils.fixtures import amqp_client, mock_client, mock_server
+from ._test_utils.helpers import read_until, to_binary, write_frames, write_handshake
+from ._test_utils.steps import given, then, when
+
+__all__ = ("mock_client", "mock_server", "amqp_client",)
+
+
+@pytest.mark.asyncio
+async def test_confirm_pipelined_publishes(*, mock_server, mock_client):
+    with given:
+        exchange = "test_exchange"
+        reader, writer = await asyncio.open_connection("localhost", 5674)
+        write_handshake(writer)
+        write_frames(writer, [
+            (1, commands.Channel.Open()),
+            (1, commands.Confirm.Select()),
+        ])
+        await read_until(reader, commands.Confirm.SelectOk)
+
+    with when:
+        bodies = [to_binary({"index": index}) for index in range(100)]
+        write_frames(writer, [frame for body in bodies for frame in [
+            (1, commands.Basic.Publish(exchange=exchange)),
+            (1, ContentHeader(body_size=len(body))),
+            (1, ContentBody(body)),
+        ]])
+        await writer.drain()
+        frames = await read_until(reader, commands.Basic.Ack)
+
+    with then:
+        acks = [x for x in frames if isinstance(x, commands.Basic.Ack)]
+        assert len(acks) == 1
+        assert acks[0].delivery_tag == 100
+        assert acks[0].multiple is True
+
+        published = await mock_client.get_exchange_messages(exchange)
+        assert len(published) == 100
+
+        writer.close()
+
+
+@pytest.mark.asyncio
+async def test_confirm_publishes_while_consuming(*, mock_server, mock_client, amqp_client):
+    with given:
+        queue = "test_queue"
+        exchange = "test_exchange"
+        await mock_client.publish_message(queue, Message("text"))
+        await amqp_client.consume(queue)
+        await amqp_client.wait_for(message_count=1)
+
+    with when:
+        await amqp_client.publish(to_binary("text1"), exchange)
+        await amqp_client.publish(to_binary("text2"), exchange)
+
+    with then:
+        published = await mock_client.get_exchange_messages(exchange)
+        assert len(published) == 2
@@ -0,0 +1,82 @@
+import pytest
+from pamqp import commands
+from pamqp.frame import marshal
+from pamqp.heartbeat import Heartbeat
+
+from amqp_mock import AmqpServer, HttpServer, Storage, create_amqp_mock
+from amqp_mock.amqp_server import INBOUND, OUTBOUND, AmqpRecorder, read_recording, replay_recording
+
+from ._test_utils.amqp_client import AmqpClient
+from ._test_utils.helpers import random_uuid, to_binary
+from ._test_utils.steps import given, then, when
+
+
+async def record_session(record_dir, queue, messages):
+    amqp_server = AmqpServer(Storage(), port=5674, record_dir=str(record_dir))
+    async with create_amqp_mock(HttpServer(Storage(), port=8080), amqp_server), \
+            AmqpClient(amqp_server.host, amqp_server.port) as amqp_client:
+        await amqp_client.declare_queue(queue)
+        for message in messages:
+            await amqp_client.publish(to_binary(message), "", routing_key=queue)
+    return record_dir / "session-0001.amqprec"
+
+
+@pytest.mark.asyncio
+async def test_record_session(tmp_path):
+    with when:
+        path = await record_session(tmp_path, "test_queue", [{"id": random_uuid()}])
+
+    with then:
+        directions = {direction for direction, _, _ in read_recording(str(path))}
+        assert directions == {INBOUND, OUTBOUND}
+
+
+@pytest.mark.asyncio
+async def test_replay_session(tmp_path):
+    with given:
+        queue = "test_queue"
+        messages = [{"id": random_uuid()} for _ in range(3)]
+        path = await record_session(tmp_path, queue, messages)
+        storage = Storage()
+        amqp_server = AmqpServer(storage, port=5674)
+
+    async with given, create_amqp_mock(HttpServer(storage, port=8080), amqp_server) as mock:
+        with when:
+            result = await replay_recording(str(path), "localhost", amqp_server.port)
+
+        with then:
+            history = await mock.client.get_queue_message_history(queue)
+            assert [x.message.value for x in history] == messages[::-1]
+            assert result.bytes_received > 0
+
+
+@pytest.mark.asyncio
+async def test_replay_session_with_unanswered_frames(tmp_path):
+    with given:
+        queue = "test_queue"
+        messages = [{"id": random_uuid()} for _ in range(20)]
+        path = await record_session(tmp_path, queue, messages)
+
+        # Frames the replay server won't send: an idle heartbeat and a flow control one
+        records = list(read_recording(str(path)))
+        recorder = AmqpRecorder(str(tmp_path / "edited.amqprec"))
+        for index, (direction, _, data) in enumerate(records):
+            if index == 10:
+                recorder.record(OUTBOUND, marshal(Heartbeat(), 0))
+                recorder.record(OUTBOUND, marshal(commands.Connection.Blocked(), 0))
+            recorder.record(direction, data)
+        recorder.close()
+
+        storage = Storage()
+        amqp_server = AmqpServer(storage, port=5674)
+
+    async with given, create_amqp_mock(HttpServer(storage, port=8080), amqp_server) as mock:
+        with when:
+            result = await replay_recording(recorder.path, "localhost", amqp_server.port,
+                                            timeout=0.5)
+
+        with then:
+            history = await mock.client.get_queue_message_history(queue)
+            assert len(history) == len(messages)
+            # Only the missing Connection.Blocked is waited for, and only once
+            assert result.elapsed < 1.0
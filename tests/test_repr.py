@@ -1,4 +1,5 @@
 from amqp_mock import AmqpMockClient, AmqpMockServer, AmqpServer, HttpServer, Storage
+from amqp_mock._routing import TopicTrie
 
 from ._test_utils.steps import given, then, when
 
@@ -53,3 +54,17 @@ def test_mock_client_repr():
 
     with then:
         assert result == f"<AmqpMockClient host={host!r} port={port!r}>"
+
+
+def test_topic_trie_repr():
+    with given:
+        trie = TopicTrie()
+        trie.add("a.b", "queue1")
+        trie.add("a.*", "queue1")
+        trie.add("a.*", "queue2")
+
+    with when:
+        result = repr(trie)
+
+    with then:
+        assert result == "<TopicTrie patterns=2>"
@@ -0,0 +1,118 @@
+import pytest
+
+from amqp_mock import HttpServer, Message, Storage, create_amqp_mock
+
+from ._test_utils.fixtures import amqp_client, mock_client, mock_server
+from ._test_utils.helpers import to_binary
+from ._test_utils.steps import given, then, when
+
+__all__ = ("mock_client", "mock_server", "amqp_client",)
+
+
+@pytest.mark.asyncio
+async def test_queue_max_length(*, mock_server, mock_client, amqp_client):
+    with given:
+        queue = "test_queue"
+        await amqp_client.declare_queue(queue, arguments={"x-max-length": 2})
+        for message in ["text1", "text2", "text3"]:
+            await amqp_client.publish(to_binary(message), "", routing_key=queue)
+
+    with when:
+        await amqp_client.consume(queue)
+        messages = await amqp_client.wait_for(message_count=2)
+
+    with then:
+        assert [x.body for x in messages] == [to_binary("text2"), to_binary("text3")]
+        metrics = await mock_client.get_metrics()
+        assert metrics["evictions"] == {"max_length": 1}
+
+
+@pytest.mark.asyncio
+async def test_queue_message_ttl(*, mock_server, mock_client, amqp_client):
+    with given:
+        queue = "test_queue"
+        await amqp_client.declare_queue(queue, arguments={"x-message-ttl": 50})
+        await amqp_client.publish(to_binary("text"), "", routing_key=queue)
+        await amqp_client.wait(0.1)
+
+    with when:
+        message = await amqp_client.get(queue)
+
+    with then:
+        assert message is None
+        metrics = await mock_client.get_metrics()
+        assert metrics["evictions"] == {"message_ttl": 1}
+
+
+@pytest.mark.asyncio
+async def test_max_history():
+    with given:
+        storage = Storage(max_history=2)
+        queue = "test_queue"
+
+    async with given, create_amqp_mock(HttpServer(storage, port=8080)) as mock:
+        with when:
+            for message in ["text1", "text2", "text3"]:
+                await mock.client.publish_message(queue, Message(message))
+
+        with then:
+            history = await mock.client.get_queue_message_history(queue)
+            assert [x.message.value for x in history] == ["text3", "text2"]
+            assert storage.evictions == {"history": 1}
+
+
+@pytest.mark.asyncio
+async def test_max_exchange_messages():
+    with given:
+        storage = Storage(max_exchange_messages=2)
+        exchange = "test_exchange"
+
+    async with given, create_amqp_mock(HttpServer(storage, port=8080)) as mock:
+        with when:
+            for message in ["text1", "text2", "text3"]:
+                await storage.add_message_to_exchange(exchange, Message(message))
+
+        with then:
+            messages = await mock.client.get_exchange_messages(exchange)
+            assert [x.value for x in messages] == ["text3", "text2"]
+            assert storage.evictions == {"exchange_log": 1}
+
+
+@pytest.mark.asyncio
+async def test_queue_message_ttl_with_consumer(*, mock_server, mock_client, amqp_client):
+    with given:
+        queue = "test_queue"
+        await amqp_client.declare_queue(queue, arguments={"x-message-ttl": 0})
+        await amqp_client.consume(queue)
+
+    with when:
+        await amqp_client.publish(to_binary("text"), "", routing_key=queue)
+
+    with then:
+        messages = await amqp_client.wait_for(message_count=1)
+        assert messages[0].body == to_binary("text")
+        metrics = await mock_client.get_metrics()
+        assert metrics["evictions"] == {}
+
+
+@pytest.mark.asyncio
+async def test_queue_max_length_within_budget():
+    with given:
+        storage = Storage(max_messages=2)
+        blocked_events = []
+
+        async def on_blocked(blocked):
+            blocked_events.append(blocked)
+
+        storage.on_blocked(on_blocked)
+        queue = "test_queue"
+        await storage.declare_queue(queue, {"x-max-length": 2})
+
+    with when:
+        for message in ["text1", "text2", "text3", "text4"]:
+            await storage.add_message_to_queue(queue, Message(message))
+
+    with then:
+        assert blocked_events == []
+        assert await storage.get_queue_size(queue) == 2
+        assert storage.evictions == {"max_length": 2}
@@ -150,3 +150,200 @@ async def test_routing_fanout_exchange(*, mock_server, mock_client, amqp_client)
                 "status": MessageStatus.INIT,
             }
         ])
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(("pattern", "routing_key", "routed"), [
+    ("a.b.c", "a.b.c", True),
+    ("a.b.c", "a.b", False),
+    ("a.*.c", "a.b.c", True),
+    ("a.*.c", "a.c", False),
+    ("a.#", "a", True),
+    ("a.#", "a.b.c", True),
+    ("#.c", "a.b.c", True),
+    ("a.#.c", "a.c", True),
+    ("a.#.c", "a.b.d", False),
+    ("#", "", True),
+    ("*", "a.b", False),
+])
+async def test_routing_topic_exchange(pattern, routing_key, routed, *,
+                                      mock_server, mock_client, amqp_client):
+    with given:
+        exchange = "test_exchange"
+        queue = "test_queue"
+        message = {"id": random_uuid()}
+
+        await amqp_client.declare_exchange(exchange, "topic")
+        await amqp_client.queue_bind(queue, exchange, routing_key=pattern)
+
+    with when:
+        await amqp_client.publish(to_binary(message), exchange, routing_key=routing_key)
+
+    with then:
+        history = await mock_client.get_queue_message_history(queue)
+        assert len(history) == (1 if routed else 0)
+
+
+@pytest.mark.asyncio
+async def test_routing_topic_exchange_new_binding(*, mock_server, mock_client, amqp_client):
+    with given:
+        exchange = "test_exchange"
+        queue1, queue2 = "test_queue1", "test_queue2"
+        routing_key = "a.b"
+
+        await amqp_client.declare_exchange(exchange, "topic")
+        await amqp_client.queue_bind(queue1, exchange, routing_key="a.*")
+        await amqp_client.publish(to_binary({"id": random_uuid()}), exchange, routing_key)
+
+    with when:
+        await amqp_client.queue_bind(queue2, exchange, routing_key="#.b")
+        await amqp_client.publish(to_binary({"id": random_uuid()}), exchange, routing_key)
+
+    with then:
+        history_queue1 = await mock_client.get_queue_message_history(queue1)
+        assert len(history_queue1) == 2
+
+        history_queue2 = await mock_client.get_queue_message_history(queue2)
+        assert len(history_queue2) == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(("arguments", "headers", "routed"), [
+    ({"x-match": "all", "a": "1", "b": "2"}, {"a": "1", "b": "2", "c": "3"}, True),
+    ({"x-match": "all", "a": "1", "b": "2"}, {"a": "1"}, False),
+    ({"x-match": "all", "a": "1"}, {"a": "2"}, False),
+    ({"x-match": "any", "a": "1", "b": "2"}, {"b": "2"}, True),
+    ({"x-match": "any", "a": "1", "b": "2"}, {"c": "3"}, False),
+    ({"a": "1"}, {"a": "1"}, True),
+    ({"x-match": "all"}, {}, True),
+])
+async def test_routing_headers_exchange(arguments, headers, routed, *,
+                                        mock_server, mock_client, amqp_client):
+    with given:
+        exchange = "test_exchange"
+        queue = "test_queue"
+        message = {"id": random_uuid()}
+
+        await amqp_client.declare_exchange(exchange, "headers")
+        await amqp_client.queue_bind(queue, exchange, arguments=arguments)
+
+    with when:
+        await amqp_client.publish(to_binary(message), exchange, headers=headers)
+
+    with then:
+        history = await mock_client.get_queue_message_history(queue)
+        assert len(history) == (1 if routed else 0)
+
+
+@pytest.mark.asyncio
+async def test_routing_same_routing_key_many_queues(*, mock_server, mock_client, amqp_client):
+    with given:
+        exchange = "test_exchange"
+        queue1, queue2 = "test_queue1", "test_queue2"
+        routing_key = "test_routing_key"
+
+        await amqp_client.declare_exchange(exchange)
+        for queue in [queue1, queue2, queue1]:
+            await amqp_client.queue_bind(queue, exchange, routing_key=routing_key)
+
+    with when:
+        await amqp_client.publish(to_binary({"id": random_uuid()}), exchange, routing_key)
+
+    with then:
+        history_queue1 = await mock_client.get_queue_message_history(queue1)
+        assert len(history_queue1) == 1
+
+        history_queue2 = await mock_client.get_queue_message_history(queue2)
+        assert len(history_queue2) == 1
+
+
+@pytest.mark.asyncio
+async def test_routing_fanout_exchange_many_routing_keys(*, mock_server, mock_client,
+                                                         amqp_client):
+    with given:
+        exchange = "test_exchange"
+        queue = "test_queue"
+
+        await amqp_client.declare_exchange(exchange, "fanout")
+        for routing_key in ["key1", "key2"]:
+            await amqp_client.queue_bind(queue, exchange, routing_key=routing_key)
+
+    with when:
+        await amqp_client.publish(to_binary({"id": random_uuid()}), exchange)
+
+    with then:
+        history = await mock_client.get_queue_message_history(queue)
+        assert len(history) == 1
+
+
+@pytest.mark.asyncio
+async def test_routing_exchange_to_exchange(*, mock_server, mock_client, amqp_client):
+    with given:
+        source, destination = "test_source", "test_destination"
+        queue = "test_queue"
+        routing_key = "a.b"
+        message = {"id": random_uuid()}
+
+        await amqp_client.declare_exchange(source, "topic")
+        await amqp_client.declare_exchange(destination, "fanout")
+        await amqp_client.exchange_bind(destination, source, routing_key="a.*")
+        await amqp_client.queue_bind(queue, destination)
+
+    with when:
+        await amqp_client.publish(to_binary(message), source, routing_key=routing_key)
+
+    with then:
+        history = await mock_client.get_queue_message_history(queue)
+        assert to_dict(history) == schema.list([
+            QueuedMessageSchema % {
+                "message": {
+                    "value": message,
+                    "exchange": source,
+                    "routing_key": routing_key,
+                },
+                "queue": queue,
+                "status": MessageStatus.INIT,
+            }
+        ])
+
+
+@pytest.mark.asyncio
+async def test_routing_exchange_to_exchange_cycle(*, mock_server, mock_client, amqp_client):
+    with given:
+        exchange1, exchange2 = "test_exchange1", "test_exchange2"
+        queue = "test_queue"
+
+        await amqp_client.declare_exchange(exchange1, "fanout")
+        await amqp_client.declare_exchange(exchange2, "fanout")
+        await amqp_client.exchange_bind(exchange2, exchange1)
+        await amqp_client.exchange_bind(exchange1, exchange2)
+        await amqp_client.queue_bind(queue, exchange1)
+        await amqp_client.queue_bind(queue, exchange2)
+
+    with when:
+        await amqp_client.publish(to_binary({"id": random_uuid()}), exchange1)
+
+    with then:
+        history = await mock_client.get_queue_message_history(queue)
+        assert len(history) == 1
+
+
+@pytest.mark.asyncio
+async def test_routing_exchange_to_exchange_new_binding(*, mock_server, mock_client,
+                                                        amqp_client):
+    with given:
+        source, destination = "test_source", "test_destination"
+        queue = "test_queue"
+
+        await amqp_client.declare_exchange(source, "fanout")
+        await amqp_client.declare_exchange(destination, "fanout")
+        await amqp_client.queue_bind(queue, destination)
+        await amqp_client.publish(to_binary({"id": random_uuid()}), source)
+
+    with when:
+        await amqp_client.exchange_bind(destination, source)
+        await amqp_client.publish(to_binary({"id": random_uuid()}), source)
+
+    with then:
+        history = await mock_client.get_queue_message_history(queue)
+        assert len(history) == 1
@@ -0,0 +1,41 @@
+import pytest
+
+from amqp_mock import AmqpMockClient, AmqpMockSupervisor, Message
+
+from ._test_utils.amqp_client import AmqpClient
+from ._test_utils.steps import given, then, when
+
+
+@pytest.mark.asyncio
+async def test_supervisor_workers():
+    with given:
+        supervisor = AmqpMockSupervisor(2, port=8080)
+
+    with when:
+        async with supervisor:
+            workers = await AmqpMockClient(port=8080).get_workers()
+
+    with then:
+        assert sorted(workers) == ["gw0", "gw1"]
+        ports = [(x["http_port"], x["amqp_port"]) for x in workers.values()]
+        assert len(set(ports)) == 2
+
+
+@pytest.mark.asyncio
+async def test_supervisor_isolated_workers():
+    with given:
+        queue = "test_queue"
+        supervisor = AmqpMockSupervisor(2, port=8080, http_port=8081, amqp_port=5675)
+
+    with when:
+        async with supervisor:
+            await AmqpMockClient(port=8081).publish_message(queue, Message("text"))
+            async with AmqpClient(port=5675) as client1, AmqpClient(port=5676) as client2:
+                await client1.consume(queue)
+                await client2.consume(queue)
+                await client1.wait_for(message_count=1)
+                await client2.wait(0.1)
+
+    with then:
+        assert len(client1.get_consumed_messages()) == 1
+        assert len(client2.get_consumed_messages()) == 0
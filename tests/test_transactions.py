@@ -0,0 +1,133 @@
+import pytest
+from aiormq.exceptions import ChannelPreconditionFailed
+from pytest import raises
+
+from amqp_mock import Message, MessageStatus
+
+from ._test_utils.fixtures import amqp_client, mock_client, mock_server
+from ._test_utils.helpers import random_uuid, to_binary
+from ._test_utils.steps import given, then, when
+
+__all__ = ("mock_client", "mock_server", "amqp_client",)
+
+
+@pytest.mark.asyncio
+async def test_tx_publish_before_commit(*, mock_server, mock_client, amqp_client):
+    with given:
+        exchange = "test_exchange"
+        await amqp_client.tx_select()
+
+    with when:
+        await amqp_client.publish(to_binary({"id": random_uuid()}), exchange)
+
+    with then:
+        messages = await mock_client.get_exchange_messages(exchange)
+        assert len(messages) == 0
+
+
+@pytest.mark.asyncio
+async def test_tx_commit(*, mock_server, mock_client, amqp_client):
+    with given:
+        exchange, queue = "test_exchange", "test_queue"
+        await amqp_client.declare_exchange(exchange)
+        await amqp_client.queue_bind(queue, exchange, routing_key=queue)
+        message1, message2 = {"id": random_uuid()}, {"id": random_uuid()}
+
+        await amqp_client.tx_select()
+        await amqp_client.publish(to_binary(message1), exchange, routing_key=queue)
+        await amqp_client.publish(to_binary(message2), exchange, routing_key=queue)
+
+    with when:
+        await amqp_client.tx_commit()
+
+    with then:
+        messages = await mock_client.get_exchange_messages(exchange)
+        assert [x.value for x in messages] == [message2, message1]
+
+        history = await mock_client.get_queue_message_history(queue)
+        assert [x.message.value for x in history] == [message2, message1]
+
+
+@pytest.mark.asyncio
+async def test_tx_rollback(*, mock_server, mock_client, amqp_client):
+    with given:
+        exchange = "test_exchange"
+        await amqp_client.tx_select()
+        await amqp_client.publish(to_binary({"id": random_uuid()}), exchange)
+
+    with when:
+        await amqp_client.tx_rollback()
+        await amqp_client.tx_commit()
+
+    with then:
+        messages = await mock_client.get_exchange_messages(exchange)
+        assert len(messages) == 0
+
+
+@pytest.mark.asyncio
+async def test_tx_ack(*, mock_server, mock_client, amqp_client):
+    with given:
+        queue = "test_queue"
+        await mock_client.publish_message(queue, Message("text"))
+        await amqp_client.tx_select()
+        result = await amqp_client.get(queue, no_ack=False)
+
+    with when:
+        await amqp_client.basic_ack(result.delivery.delivery_tag)
+        await amqp_client.wait(0.1)
+        history_before = await mock_client.get_queue_message_history(queue)
+        await amqp_client.tx_commit()
+
+    with then:
+        assert history_before[0].status == MessageStatus.CONSUMING
+
+        history = await mock_client.get_queue_message_history(queue)
+        assert history[0].status == MessageStatus.ACKED
+
+
+@pytest.mark.asyncio
+async def test_tx_rollback_ack(*, mock_server, mock_client, amqp_client):
+    with given:
+        queue = "test_queue"
+        await mock_client.publish_message(queue, Message("text"))
+        await amqp_client.tx_select()
+        result = await amqp_client.get(queue, no_ack=False)
+        await amqp_client.basic_ack(result.delivery.delivery_tag)
+        await amqp_client.tx_rollback()
+
+    with when:
+        await amqp_client.basic_ack(result.delivery.delivery_tag)
+        await amqp_client.tx_commit()
+
+    with then:
+        history = await mock_client.get_queue_message_history(queue)
+        assert history[0].status == MessageStatus.ACKED
+
+
+@pytest.mark.asyncio
+async def test_tx_commit_without_select(*, mock_server, mock_client, amqp_client):
+    with when, raises(ChannelPreconditionFailed) as exception:
+        await amqp_client.tx_commit()
+
+    with then:
+        assert isinstance(exception.value, ChannelPreconditionFailed)
+
+
+@pytest.mark.asyncio
+async def test_tx_commit_keeps_publish_order(*, mock_server, mock_client, amqp_client):
+    with given:
+        exchange, queue = "test_exchange", "test_queue"
+        await amqp_client.declare_exchange(exchange, "fanout")
+        await amqp_client.queue_bind(queue, exchange)
+
+        await amqp_client.tx_select()
+        await amqp_client.publish(to_binary("text1"), exchange)
+        await amqp_client.publish(to_binary("text2"), "", routing_key=queue)
+        await amqp_client.publish(to_binary("text3"), exchange)
+
+    with when:
+        await amqp_client.tx_commit()
+
+    with then:
+        history = await mock_client.get_queue_message_history(queue)
+        assert [x.message.value for x in history] == ["text3", "text2", "text1"]
@@ -0,0 +1,57 @@
+import pytest
+
+from ._test_utils.fixtures import amqp_client, mock_client, mock_server
+from ._test_utils.helpers import random_uuid, to_binary
+from ._test_utils.steps import given, then, when
+
+__all__ = ("mock_client", "mock_server", "amqp_client",)
+
+
+@pytest.mark.asyncio
+async def test_wire_tap_disabled(*, mock_server, mock_client, amqp_client):
+    with given:
+        await amqp_client.publish(to_binary({"id": random_uuid()}), "test_exchange")
+
+    with when:
+        wire_tap = await mock_client.get_wire_tap()
+
+    with then:
+        assert wire_tap["size"] == 0
+        assert wire_tap["connections"][0]["frames"] == []
+
+
+@pytest.mark.asyncio
+async def test_wire_tap(*, mock_server, mock_client, amqp_client):
+    with given:
+        exchange = "test_exchange"
+        await mock_client.set_wire_tap(3)
+
+    with when:
+        await amqp_client.publish(to_binary({"id": random_uuid()}), exchange, routing_key="key")
+        wire_tap = await mock_client.get_wire_tap()
+
+    with then:
+        assert wire_tap["size"] == 3
+
+        frames = wire_tap["connections"][0]["frames"]
+        assert [(x["direction"], x["frame"]) for x in frames] == [
+            ("<-", "ContentHeader"), ("<-", "ContentBody"), ("->", "Basic.Ack"),
+        ]
+
+
+@pytest.mark.asyncio
+async def test_wire_tap_arguments(*, mock_server, mock_client, amqp_client):
+    with given:
+        exchange = "test_exchange"
+        await mock_client.set_wire_tap(10)
+
+    with when:
+        await amqp_client.publish(to_binary({"id": random_uuid()}), exchange, routing_key="key")
+        wire_tap = await mock_client.get_wire_tap()
+
+    with then:
+        frames = wire_tap["connections"][0]["frames"]
+        publish = next(x for x in frames if x["frame"] == "Basic.Publish")
+        assert publish["channel"] == 1
+        assert publish["arguments"]["exchange"] == exchange
+        assert publish["arguments"]["routing_key"] == "key"